@@ -0,0 +1,62 @@
+"""
+Bulk decoding kernel for the profile classifier
+
+Keys pack the opcode, funct3 and funct7 fields of an instruction word as
+opcode << 10 | funct3 << 7 | funct7 (17 bits).
+"""
+
+# Batches with at least this many words are decoded with NumPy when it is installed
+NUMPY_MIN_WORDS = 4096
+
+# NumPy module, only imported by the first batch large enough to use it (see _load_numpy)
+np = None
+_numpy_loaded = False
+
+def _load_numpy():
+    """Import NumPy on first use, returns None when it is not installed"""
+    global np, _numpy_loaded
+    if not _numpy_loaded:
+        _numpy_loaded = True
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        np = numpy
+    return np
+
+def decode_key(instr_int):
+    """Pack the opcode, funct3 and funct7 fields of an instruction into a single integer key"""
+    return ((instr_int & 0x7F) << 10) | ((instr_int >> 5) & 0x380) | ((instr_int >> 25) & 0x7F)
+
+def decode_batch(words, table):
+    """
+    Look up the table entry of every 32-bit word in a batch
+    
+    Args:
+        words: Iterable of unsigned 32-bit instruction words
+        table: Dense sequence of decode entry IDs indexed by packed key
+        
+    Returns:
+        List with the entry ID (0 when unknown) of each word, in order
+    """
+    # Words are at most 32 bits wide, so funct7 needs no mask
+    return [table[((w & 0x7F) << 10) | ((w >> 5) & 0x380) | (w >> 25)] for w in words]
+
+def decode_distinct(words, table):
+    """
+    Find the distinct table entries used by a batch of 32-bit words
+    
+    Args:
+        words: array of unsigned 32-bit instruction words
+        table: array('H') of decode entry IDs indexed by packed key
+        
+    Returns:
+        Set of entry IDs (including 0 when some words are unknown)
+    """
+    # Small batches stay in Python, so that short runs never pay for importing NumPy
+    if len(words) >= NUMPY_MIN_WORDS and _load_numpy() is not None:
+        # Extract the keys of all the words at once instead of deduplicating them in Python
+        w = np.frombuffer(words, dtype=np.uint32)
+        keys = ((w & 0x7F) << 10) | ((w >> 5) & 0x380) | (w >> 25)
+        return set(np.unique(np.frombuffer(table, dtype=np.uint16)[keys]).tolist())
+    return set(decode_batch(set(words), table))
@@ -1,14 +1,310 @@
 import sys
 import os
+import re
+from copy import deepcopy
+from array import array
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property, lru_cache
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from parser.instruction_parser import RiscVInstructionParser
 from risc_v_profiles import RiscVProfiles
+from classifier._decode_kernel import decode_distinct, decode_key
+
+# Typecode for unsigned 32-bit words ('I' is 4 bytes on every mainstream platform)
+_WORD_TYPECODE = 'I' if array('I').itemsize == 4 else 'L'
+
+# Low bytes of 32-bit instructions (bits 1..0 set); any other value starts a 16-bit RVC instruction
+_UNCOMPRESSED_LOW_BYTES = bytes(b for b in range(256) if b & 0x3 == 0x3)
+
+# Number of distinct instruction words kept by the decoder cache
+DECODE_CACHE_SIZE = 4096
+
+# Extension ID of unknown instructions; its name is None so it is never tracked
+UNKNOWN_EXT_ID = 0
+
+# Extension names the parser reports for instructions it cannot attribute
+_UNKNOWN_EXTENSION_NAMES = ("Unknown Extension", "Unknown")
+
+# Well-formed hex file line; anything else goes through the parser's error reporting
+_HEX_RE = re.compile(rb'(?:0[xX])?[0-9a-fA-F]+')
+
+# Hex files with at least this many lines are converted to integers on all cores
+PARALLEL_HEX_LINES = 1000000
+
+# 32-bit binaries with at least this many words are decoded on all cores
+PARALLEL_DECODE_WORDS = 4000000
+
+# Number of distinct extension sets kept by the profile lookup cache
+PROFILE_CACHE_SIZE = 256
+
+# Number of profiles whose requirements are kept by the requirements cache
+REQUIREMENTS_CACHE_SIZE = 64
+
+def _unpack_words(binary_data, offset=0):
+    """Read the little-endian 32-bit words of binary_data starting at offset"""
+    words = array(_WORD_TYPECODE)
+    size = max(0, len(binary_data) - offset) // 4 * 4
+    if size:
+        words.frombytes(memoryview(binary_data)[offset:offset + size])
+        if sys.byteorder == 'big':
+            words.byteswap()
+    return words
+
+def _unpack_halfwords(binary_data, offset=0):
+    """Read the little-endian 16-bit halfwords of binary_data starting at offset"""
+    halfwords = array('H')
+    size = max(0, len(binary_data) - offset) // 2 * 2
+    if size:
+        halfwords.frombytes(memoryview(binary_data)[offset:offset + size])
+        if sys.byteorder == 'big':
+            halfwords.byteswap()
+    return halfwords
+
+def _is_uncompressed(binary_data, offset=0):
+    """
+    Check whether binary_data holds only 32-bit instructions
+    
+    Words starting with the all-zero illegal halfword (padding, embedded data)
+    do not count as compressed instructions; they are decoded as 32-bit words.
+    """
+    size = len(binary_data) - offset
+    if size % 4:
+        return False
+    low_bytes = bytes(memoryview(binary_data)[offset::4])
+    if not low_bytes.translate(None, _UNCOMPRESSED_LOW_BYTES):
+        return True
+    # Only look at the whole halfwords when some word does not look like a 32-bit instruction
+    return all(halfword & 0x3 == 0x3 or halfword == 0
+               for halfword in _unpack_halfwords(binary_data, offset)[::2])
+
+def _parse_hex_lines(lines):
+    """Convert well-formed hex lines to integers, None for the malformed ones"""
+    hex_match = _HEX_RE.fullmatch
+    return [int(line, 16) if hex_match(line) else None for line in lines]
+
+def _hex_to_words(digits, count):
+    """Convert a run of 8-digit big-endian hex words, None unless it holds exactly count of them"""
+    try:
+        data = bytes.fromhex(digits.decode('ascii'))
+    except ValueError:
+        return None
+    if len(data) != 4 * count:
+        # Whitespace inside a word
+        return None
+    
+    words = array(_WORD_TYPECODE, data)
+    if sys.byteorder == 'little':
+        words.byteswap()
+    return words
+
+def _parse_hex_words(lines):
+    """
+    Convert lines that are all exactly 8 hex digits in one go
+    
+    Returns:
+        Array of the words, or None when some line has another format
+    """
+    if any(len(line) != 8 for line in lines):
+        return None
+    return _hex_to_words(b''.join(lines), len(lines))
+
+def _parse_hex_dump(data):
+    """
+    Convert stripped file contents holding one 8-digit hex word per line, without splitting the lines
+    
+    Returns:
+        Array of the words, or None when there are comments, blank lines or other formats
+    """
+    data = data.replace(b'\r\n', b'\n')
+    count = (len(data) + 1) // 9
+    if not count or len(data) != 9 * count - 1 or data[8::9] != b'\n' * (count - 1):
+        return None
+    return _hex_to_words(data.translate(None, b'\n'), count)
+
+def _parse_hex_lines_parallel(lines):
+    """Run _parse_hex_lines over one chunk of lines per core"""
+    workers = os.cpu_count() or 1
+    if workers == 1:
+        return _parse_hex_lines(lines)
+    
+    chunk_size = -(-len(lines) // workers)
+    chunks = [lines[i:i + chunk_size] for i in range(0, len(lines), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return [value for values in executor.map(_parse_hex_lines, chunks) for value in values]
+
+def _decode_distinct_parallel(words, table):
+    """Run decode_distinct over one chunk of words per core"""
+    workers = os.cpu_count() or 1
+    if workers == 1:
+        return decode_distinct(words, table)
+    
+    chunk_size = -(-len(words) // workers)
+    chunks = [words[i:i + chunk_size] for i in range(0, len(words), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return set().union(*executor.map(decode_distinct, chunks, [table] * len(chunks)))
+
+class _LazyRows(Sequence):
+    """
+    Instructions of a binary, stored as parallel word and offset arrays
+    
+    The instruction dicts are only built when accessed, so callers that
+    just count or slice the instructions never pay for them. Each access
+    returns a new dict. Without decode_compressed, every word is decoded as
+    a 32-bit instruction, even one whose low halfword is zero.
+    """
+    
+    def __init__(self, words, offsets, decode, decode_compressed=None):
+        self._words = words
+        self._offsets = offsets
+        self._decode = decode
+        self._decode_compressed = decode_compressed
+    
+    def _row(self, word, offset):
+        if self._decode_compressed is not None and word & 0x3 != 0x3:
+            instruction = dict(self._decode_compressed(word)[0])
+        else:
+            instruction = dict(self._decode(word)[0])
+        
+        # Store instruction info
+        instruction["offset"] = offset
+        return instruction
+    
+    def __len__(self):
+        return len(self._words)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(word, offset)
+                    for word, offset in zip(self._words[index], self._offsets[index])]
+        return self._row(self._words[index], self._offsets[index])
+    
+    def __iter__(self):
+        for word, offset in zip(self._words, self._offsets):
+            yield self._row(word, offset)
+    
+    def __repr__(self):
+        return f"<{len(self)} instructions>"
 
 class ProfileClassifier:
     def __init__(self):
-        self.parser = RiscVInstructionParser()
+        # The parser and the decode table are only loaded once instructions are decoded
         self.profiles_db = RiscVProfiles()
+        # Decoding is pure, so the caches never need to be invalidated
+        self._decode_cached = lru_cache(maxsize=DECODE_CACHE_SIZE)(self._decode_word)
+        self._decode_compressed_cached = lru_cache(maxsize=DECODE_CACHE_SIZE)(self._decode_compressed)
+        # The same extension sets come back across files, so profile lookups are cached too.
+        # They are keyed by the database version since profiles can be edited.
+        self._compatible_profiles_cached = lru_cache(maxsize=PROFILE_CACHE_SIZE)(self._find_compatible_profiles)
+        self._profile_requirements_cached = lru_cache(maxsize=REQUIREMENTS_CACHE_SIZE)(self._compute_profile_requirements)
+    
+    @cached_property
+    def parser(self):
+        """Instruction parser, loading the opcodes database on first use"""
+        return RiscVInstructionParser()
+    
+    @cached_property
+    def _decode_table(self):
+        """Decode table, see _build_decode_table"""
+        return self._build_decode_table()
+    
+    @cached_property
+    def _instruction_extensions(self):
+        """Extension of every instruction name, the first one in the opcodes database wins"""
+        instruction_extensions = {}
+        for ext, opcodes in self.parser.opcodes_db.items():
+            for instr in opcodes:
+                instruction_extensions.setdefault(instr.get('instruction'), ext)
+        return instruction_extensions
+    
+    def _build_decode_table(self):
+        """
+        Build a dense table mapping every (opcode, funct3, funct7) key to a decode entry ID
+        
+        Entry 0 means unknown. Wildcard funct3/funct7 entries cover all the keys
+        they match, and the first entry in the opcodes database wins, exactly
+        as in the parser's linear search. Also builds the entry lists the table
+        refers to, so the table must be accessed before them.
+        """
+        entries = [None]
+        self._ext_names = [None]
+        ext_ids = dict.fromkeys(_UNKNOWN_EXTENSION_NAMES, UNKNOWN_EXT_ID)
+        entry_ext = [UNKNOWN_EXT_ID]
+        for ext, opcodes in self.parser.opcodes_db.items():
+            for instr in opcodes:
+                entries.append((ext, instr))
+                if ext not in ext_ids:
+                    ext_ids[ext] = len(self._ext_names)
+                    self._ext_names.append(ext)
+                entry_ext.append(ext_ids[ext])
+        self._decode_entries = entries
+        self._entry_ext = array('H', entry_ext)
+        
+        table = array('H', bytes(2 << 17))
+        # Fill in reverse so that earlier entries overwrite later ones
+        for entry_id in range(len(entries) - 1, 0, -1):
+            instr = entries[entry_id][1]
+            opcode = instr.get('opcode')
+            funct3 = instr.get('funct3')
+            funct7 = instr.get('funct7')
+            if (opcode not in range(128) or (funct3 is not None and funct3 not in range(8))
+                    or (funct7 is not None and funct7 not in range(128))):
+                continue
+            base = opcode << 10
+            if funct3 is None and funct7 is None:
+                table[base:base + 1024] = array('H', [entry_id]) * 1024
+            elif funct3 is None:
+                table[base + funct7:base + 1024:128] = array('H', [entry_id]) * 8
+            elif funct7 is None:
+                start = base | (funct3 << 7)
+                table[start:start + 128] = array('H', [entry_id]) * 128
+            else:
+                table[base | (funct3 << 7) | funct7] = entry_id
+        return table
+    
+    def _decode_word(self, instr_int):
+        """
+        Decode a 32-bit instruction word
+        
+        Returns:
+            Tuple with the frozen instruction fields and the extension to track
+            (None for unknown instructions)
+        """
+        entry_id = self._decode_table[decode_key(instr_int)]
+        if not entry_id:
+            # Let the parser report the unknown instruction
+            return tuple(self.parser.parse_binary(instr_int).items()), None
+        
+        ext, instr = self._decode_entries[entry_id]
+        instruction = self.parser.describe_instruction(instr_int, instr, ext)
+        return tuple(instruction.items()), self._ext_names[self._entry_ext[entry_id]]
+    
+    def _decode_compressed(self, halfword):
+        """Decode a 16-bit compressed instruction, see _decode_word"""
+        instruction = self.parser.parse_compressed(halfword)
+        extension = instruction["extension"]
+        if "error" in instruction or extension in _UNKNOWN_EXTENSION_NAMES:
+            extension = None
+        return tuple(instruction.items()), extension
+    
+    def _decode_hex(self, instruction_hex):
+        """Decode a hexadecimal instruction (str or bytes), see _decode_word"""
+        try:
+            instr_int = int(instruction_hex, 16)
+        except ValueError:
+            if isinstance(instruction_hex, bytes):
+                instruction_hex = instruction_hex.decode('utf-8', 'replace')
+            return tuple(self.parser.parse_hex(instruction_hex).items()), None
+        return self._decode_cached(instr_int)
+    
+    def _find_compatible_profiles(self, extensions, version):
+        """Find the profiles compatible with a frozenset of extensions in a given database version"""
+        return tuple(self.profiles_db.get_compatible_profiles(extensions))
+    
+    def _get_compatible_profiles(self, extensions):
+        """Get the profiles compatible with the given extensions, see RiscVProfiles.get_compatible_profiles"""
+        return list(self._compatible_profiles_cached(frozenset(extensions), self.profiles_db.version))
     
     def classify_instruction(self, instruction_hex):
         """
@@ -30,53 +326,36 @@ class ProfileClassifier:
         extension = instruction["extension"]
         
         # Find compatible profiles
-        compatible_profiles = self.profiles_db.get_compatible_profiles([extension])
+        compatible_profiles = self._get_compatible_profiles([extension])
         instruction["compatible_profiles"] = compatible_profiles
         
         return instruction
     
-    def classify_binary(self, binary_data, offset=0):
+    def classify_binary(self, binary_data, offset=0, limit=None):
         """
         Classify a binary file and determine which profiles can run it
         
         Args:
             binary_data: Bytes object containing the binary data
             offset: Starting offset in the binary data
+            limit: Maximum number of instructions to classify (all by default)
             
         Returns:
-            Dictionary with all instructions, extensions used, and compatible profiles
+            Dictionary with all instructions (a sequence of dicts built on access),
+            extensions used, and compatible profiles
         """
-        instructions = []
-        extensions_used = set()
+        # Instructions are at most 4 bytes long, so the rest of the binary is never read
+        if limit is not None and offset + 4 * limit < len(binary_data):
+            binary_data = binary_data[:offset + 4 * limit]
         
-        # Process 4 bytes at a time (32-bit instructions)
-        for i in range(offset, len(binary_data), 4):
-            if i + 4 <= len(binary_data):
-                # Extract 4 bytes and convert to int
-                instr_bytes = binary_data[i:i+4]
-                instr_int = int.from_bytes(instr_bytes, byteorder='little')
-                
-                # Parse the instruction
-                instruction = self.parser.parse_binary(instr_int)
-                
-                if "error" in instruction:
-                    instruction["offset"] = i
-                    instructions.append(instruction)
-                    continue
-                
-                # Use the extension already set by the parser
-                extension = instruction["extension"]
-                
-                # Store instruction info
-                instruction["offset"] = i
-                instructions.append(instruction)
-                
-                # Track used extensions
-                if extension != "Unknown Extension" and extension != "Unknown":
-                    extensions_used.add(extension)
+        # Binaries without compressed instructions take the bulk 32-bit path
+        if _is_uncompressed(binary_data, offset):
+            instructions, extensions_used = self._decode_words(binary_data, offset)
+        else:
+            instructions, extensions_used = self._decode_mixed_width(binary_data, offset, limit)
         
         # Find compatible profiles for all instructions
-        compatible_profiles = self.profiles_db.get_compatible_profiles(list(extensions_used))
+        compatible_profiles = self._get_compatible_profiles(extensions_used)
         
         return {
             "instructions": instructions,
@@ -84,12 +363,75 @@ class ProfileClassifier:
             "compatible_profiles": compatible_profiles
         }
     
+    def _decode_words(self, binary_data, offset):
+        """Decode a binary made only of 32-bit instructions"""
+        # Read all the 32-bit words at once; repeated words are served by the decoder cache
+        words = _unpack_words(binary_data, offset)
+        
+        # Only the distinct entries matter for the extensions used; huge binaries are split across processes
+        table = self._decode_table
+        entry_ext = self._entry_ext
+        if len(words) >= PARALLEL_DECODE_WORDS:
+            entry_ids = _decode_distinct_parallel(words, table)
+        else:
+            entry_ids = decode_distinct(words, table)
+        ext_ids = {entry_ext[entry_id] for entry_id in entry_ids}
+        ext_ids.discard(UNKNOWN_EXT_ID)
+        extensions_used = {self._ext_names[ext_id] for ext_id in ext_ids}
+        
+        offsets = range(offset, offset + 4 * len(words), 4)
+        # Only 32-bit words here, including those with a zero low halfword (see _is_uncompressed)
+        instructions = _LazyRows(words, offsets, self._decode_cached)
+        return instructions, extensions_used
+    
+    def _decode_mixed_width(self, binary_data, offset, limit=None):
+        """
+        Decode a binary mixing 16-bit compressed and 32-bit instructions
+        
+        The binary is walked one halfword at a time; the low 2 bits of an
+        instruction's first halfword tell whether it is 16 bits (not 0b11) or 32 bits long.
+        """
+        halfwords = _unpack_halfwords(binary_data, offset)
+        words = array(_WORD_TYPECODE)
+        offsets = array('Q')
+        
+        i = 0
+        count = len(halfwords)
+        if limit is None:
+            limit = count
+        while i < count and len(words) < limit:
+            halfword = halfwords[i]
+            if halfword & 0x3 != 0x3:
+                words.append(halfword)
+                length = 1
+            elif i + 1 < count:
+                words.append(halfword | (halfwords[i + 1] << 16))
+                length = 2
+            else:
+                # Truncated 32-bit instruction at the end of the binary
+                break
+            offsets.append(offset + 2 * i)
+            i += length
+        
+        # Track the extensions of the distinct instructions only
+        extensions_used = set()
+        for word in set(words):
+            if word & 0x3 != 0x3:
+                extension = self._decode_compressed_cached(word)[1]
+            else:
+                extension = self._decode_cached(word)[1]
+            if extension is not None:
+                extensions_used.add(extension)
+        
+        instructions = _LazyRows(words, offsets, self._decode_cached, self._decode_compressed_cached)
+        return instructions, extensions_used
+    
     def classify_hex_file(self, hex_content):
         """
         Classify a file containing hexadecimal instructions
         
         Args:
-            hex_content: String containing hexadecimal instructions
+            hex_content: String or bytes containing hexadecimal instructions
             
         Returns:
             Dictionary with all instructions, extensions used, and compatible profiles
@@ -97,46 +439,55 @@ class ProfileClassifier:
         instructions = []
         extensions_used = set()
         
-        # Split content into lines and process each line
-        lines = hex_content.strip().split('\n')
-        for line_num, line in enumerate(lines):
-            # Skip empty lines and comments
-            line = line.strip()
-            if not line or line.startswith('#'):
-                continue
+        # Work on bytes; plain dumps of 32-bit words are converted without splitting the lines
+        data = hex_content.encode('utf-8') if isinstance(hex_content, str) else hex_content
+        data = data.strip()
+        values = _parse_hex_dump(data)
+        if values is not None:
+            line_nums = range(len(values))
+        else:
+            # Drop the comments and keep only the non-empty lines
+            lines = (line.partition(b'#')[0].strip() for line in data.splitlines())
+            entries = [(line_num, line) for line_num, line in enumerate(lines) if line]
+            line_nums = [line_num for line_num, _ in entries]
+            lines = [line for _, line in entries]
             
-            # Remove any comments and whitespace
-            if '#' in line:
-                line = line.split('#')[0].strip()
-            
-            # Process the line as hexadecimal
-            try:
-                # Parse the instruction
-                instruction = self.parser.parse_hex(line)
-                
-                if "error" in instruction:
-                    instruction["line"] = line_num + 1
-                    instructions.append(instruction)
+            # Convert the lines to integers: lines of 8 hex digits are converted at once,
+            # others line by line, with huge files split across processes
+            values = _parse_hex_words(lines)
+            if values is None:
+                if len(lines) >= PARALLEL_HEX_LINES:
+                    values = _parse_hex_lines_parallel(lines)
+                else:
+                    values = _parse_hex_lines(lines)
+        
+        decode = self._decode_cached
+        for index, (line_num, value) in enumerate(zip(line_nums, values)):
+            if value is not None:
+                # Well-formed hex word, decode it directly
+                fields, extension = decode(value)
+            else:
+                # Malformed lines are rare, only they pay for the error handling
+                try:
+                    fields, extension = self._decode_hex(lines[index])
+                except Exception as e:
+                    instructions.append({
+                        "error": f"Failed to parse line {line_num + 1}: {str(e)}",
+                        "line": line_num + 1
+                    })
                     continue
-                
-                # Use the extension already set by the parser
-                extension = instruction["extension"]
-                
-                # Store instruction info
-                instruction["line"] = line_num + 1
-                instructions.append(instruction)
-                
-                # Track used extensions
-                if extension != "Unknown Extension" and extension != "Unknown":
-                    extensions_used.add(extension)
-            except Exception as e:
-                instructions.append({
-                    "error": f"Failed to parse line {line_num + 1}: {str(e)}",
-                    "line": line_num + 1
-                })
+            
+            # Store instruction info
+            instruction = dict(fields)
+            instruction["line"] = line_num + 1
+            instructions.append(instruction)
+            
+            # Track used extensions
+            if extension is not None:
+                extensions_used.add(extension)
         
         # Find compatible profiles for all instructions
-        compatible_profiles = self.profiles_db.get_compatible_profiles(list(extensions_used))
+        compatible_profiles = self._get_compatible_profiles(extensions_used)
         
         return {
             "instructions": instructions,
@@ -154,6 +505,11 @@ class ProfileClassifier:
         Returns:
             Dictionary with profile details and extension information
         """
+        # The cached requirements are copied, so that callers can modify their result
+        return deepcopy(self._profile_requirements_cached(profile_name, self.profiles_db.version))
+    
+    def _compute_profile_requirements(self, profile_name, version):
+        """Build the requirements of a profile in a given database version, see get_profile_requirements"""
         profile = self.profiles_db.get_profile_details(profile_name)
         if not profile:
             return {"error": f"Profile {profile_name} not found"}
@@ -191,9 +547,4 @@ class ProfileClassifier:
 
     def get_instruction_extension(self, instruction_name):
         """Get the extension for a given instruction name"""
-        # Search through all extensions
-        for ext, opcodes in self.opcodes_db.items():
-            for instr in opcodes:
-                if instr.get('instruction') == instruction_name:
-                    return ext
-        return None 
\ No newline at end of file
+        return self._instruction_extensions.get(instruction_name) 
\ No newline at end of file
@@ -15,18 +15,22 @@ def test_validator():
         "invalid_instr x1"
     ]
     
-    print("Testing individual lines:")
-    for i, line in enumerate(test_lines, 1):
-        print(f"\nLine {i}: '{line}'")
-        result = validator.validate_assembly_line(line, i)
-        print(f"  Type: {result['type']}")
-        print(f"  Valid: {result['valid']}")
-        print(f"  Instruction: {result.get('instruction')}")
-        print(f"  Parameters: {result.get('parameters')}")
+    # Validate all the lines at once, then write the report in a single call
+    results = validator.validate_assembly_lines(test_lines)
+    
+    output = ["Testing individual lines:"]
+    for i, (line, result) in enumerate(zip(test_lines, results), 1):
+        output.append(f"\nLine {i}: '{line}'")
+        output.append(f"  Type: {result['type']}")
+        output.append(f"  Valid: {result['valid']}")
+        output.append(f"  Instruction: {result.get('instruction')}")
+        output.append(f"  Parameters: {result.get('parameters')}")
         if result.get('errors'):
-            print(f"  Errors: {result['errors']}")
+            output.append(f"  Errors: {result['errors']}")
         if result.get('warnings'):
-            print(f"  Warnings: {result['warnings']}")
+            output.append(f"  Warnings: {result['warnings']}")
+    
+    sys.stdout.write("\n".join(output) + "\n")
 
 if __name__ == "__main__":
-    test_validator() 
\ No newline at end of file
+    test_validator()
@@ -1,31 +1,225 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import hashlib
 import os
+import io
+import tarfile
+import time
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
 import logging
 import re
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Configure logging with more detailed format
 logging.basicConfig(
-    level=logging.DEBUG,  # Changed to DEBUG level
+    level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
+# Version of the parsed opcodes cache, to bump whenever _parse_opcode_lines changes what it builds
+PARSE_CACHE_VERSION = 1
+
+# Opcode file line: instruction name followed by its operands and bit fields
+_LINE_RE = re.compile(r'[ \t]*([^\s#]\S*)(.*)')
+
+# Bit field assignment such as 14..12=0x0, 1..0=3 or 12=1
+_FIELD_RE = re.compile(r'(\d+)(?:\.\.(\d+))?=(?:0[xX])?([0-9a-fA-F]+)')
+
+# Parameter names in the operand list
+_PARAM_RE = re.compile(r'\b(rd|rs1|rs2|rs3|imm|shamt|csr)\b')
+
+# Instruction names that carry a parameter specification
+_NAME_PARAMS_RE = re.compile(r',|rd|rs1|rs2|imm')
+
+# Known instruction format mappings
+_FORMAT_MAP = {
+    # R-Type instructions
+    'add': 'R', 'sub': 'R', 'sll': 'R', 'slt': 'R', 'sltu': 'R', 'xor': 'R',
+    'srl': 'R', 'sra': 'R', 'or': 'R', 'and': 'R', 'mul': 'R', 'mulh': 'R',
+    'mulhsu': 'R', 'mulhu': 'R', 'div': 'R', 'divu': 'R', 'rem': 'R', 'remu': 'R',
+    
+    # I-Type instructions
+    'addi': 'I', 'slti': 'I', 'sltiu': 'I', 'xori': 'I', 'ori': 'I', 'andi': 'I',
+    'slli': 'I', 'srli': 'I', 'srai': 'I', 'lb': 'I', 'lh': 'I', 'lw': 'I',
+    'lbu': 'I', 'lhu': 'I', 'jalr': 'I', 'ecall': 'I', 'ebreak': 'I',
+    
+    # S-Type instructions
+    'sb': 'S', 'sh': 'S', 'sw': 'S',
+    
+    # B-Type instructions
+    'beq': 'B', 'bne': 'B', 'blt': 'B', 'bge': 'B', 'bltu': 'B', 'bgeu': 'B',
+    
+    # U-Type instructions
+    'lui': 'U', 'auipc': 'U',
+    
+    # J-Type instructions
+    'jal': 'J'
+}
+
+# Names that look like I-Type / B-Type instructions but are not
+_I_EXCLUDE = frozenset({'lui'})
+_B_EXCLUDE = frozenset({'beqz', 'bnez'})
+
+# Parameter constraints for random generation, built once and shared by all the instructions
+_PARAM_CONSTRAINTS = {
+    'rd': {
+        'type': 'register',
+        'min': 0,
+        'max': 31,
+        'description': 'Destination register (x0-x31)',
+        'exclude': []  # Could exclude x0 for some instructions
+    },
+    'rs1': {
+        'type': 'register', 
+        'min': 0,
+        'max': 31,
+        'description': 'Source register 1 (x0-x31)',
+        'exclude': []
+    },
+    'rs2': {
+        'type': 'register',
+        'min': 0,
+        'max': 31, 
+        'description': 'Source register 2 (x0-x31)',
+        'exclude': []
+    },
+    'imm': {
+        'type': 'immediate',
+        'min': -2048,  # 12-bit signed immediate default
+        'max': 2047,
+        'description': 'Immediate value',
+        'bits': 12
+    }
+}
+
+_UNKNOWN_CONSTRAINT = {'type': 'unknown'}
+
+# Parameter records shared by every instruction that takes the parameter
+_PARAM_INFO = {
+    name: {'name': name, 'constraints': _PARAM_CONSTRAINTS.get(name, _UNKNOWN_CONSTRAINT)}
+    for name in ('rd', 'rs1', 'rs2', 'rs3', 'imm', 'shamt', 'csr')
+}
+
+@lru_cache(maxsize=64)
+def _template_operands(params: Tuple[str, ...]) -> str:
+    """Build the operand list of an assembly template, e.g. "x{rd}, x{rs1}, {imm}"."""
+    return ', '.join(f"x{{{param}}}" if param in ('rd', 'rs1', 'rs2', 'rs3') else f"{{{param}}}"
+                     for param in params)
+
+def _parse_fields(rest: str) -> Dict:
+    """
+    Parse the bit field assignments of an opcode file line.
+    
+    Returns the field values keyed by (msb, lsb) bit ranges, lsb is None for single bits.
+    Raises ValueError for a field that is not a bit range set to a hex value.
+    """
+    fields = {}
+    for token in rest.split():
+        if '=' not in token:
+            continue
+        field_match = _FIELD_RE.fullmatch(token)
+        if not field_match:
+            raise ValueError(f"invalid field '{token}'")
+        msb, lsb, value = field_match.groups()
+        fields[int(msb), int(lsb) if lsb else None] = int(value, 16)
+    return fields
+
+def _dumps(obj) -> bytes:
+    """Serialize obj as JSON indented by 2 spaces, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode()
+
+class _StreamingJSONWriter:
+    """
+    Writes a JSON object to a file one key at a time.
+    
+    The object is written to a temporary file next to path, which only replaces
+    path once it is complete, so a failed run keeps the previous file.
+    """
+    
+    def __init__(self, path: Path):
+        self._path = path
+        self._tmp_path = path.with_name(path.name + '.tmp')
+        self._file = open(self._tmp_path, 'wb')
+        self._file.write(b'{')
+        self._needs_comma = False
+    
+    def write(self, key: str, value):
+        """Append a key and its value to the object."""
+        self.write_serialized(key, _dumps(value))
+    
+    def write_serialized(self, key: str, data: bytes):
+        """Append a key and its value, already serialized by _dumps, to the object."""
+        self._file.write(b',\n  ' if self._needs_comma else b'\n  ')
+        self._file.write(_dumps(key) + b': ' + data.replace(b'\n', b'\n  '))
+        self._needs_comma = True
+    
+    def close(self):
+        """Close the object and replace the file with it."""
+        self._file.write(b'\n}' if self._needs_comma else b'}')
+        self._file.close()
+        os.replace(self._tmp_path, self._path)
+    
+    def discard(self):
+        """Drop the object written so far, leaving the file untouched."""
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
 class RiscVOpcodesFetcher:
     """Fetches RISC-V opcode definitions from the GitHub repository."""
     
     BASE_URL = "https://api.github.com/repos/riscv/riscv-opcodes/contents"
     RAW_BASE_URL = "https://raw.githubusercontent.com/riscv/riscv-opcodes/master"
+    TREE_URL = "https://api.github.com/repos/riscv/riscv-opcodes/git/trees/master?recursive=1"
+    TARBALL_URL = "https://api.github.com/repos/riscv/riscv-opcodes/tarball/master"
+    
+    # Directory of the extension files in the riscv-opcodes repository
+    EXTENSIONS_DIR = "extensions/"
+    
+    # Number of extension files fetched in parallel; kept under 10 so that
+    # GitHub's secondary rate limit does not flag the burst of requests
+    MAX_WORKERS = 8
+    
+    # Number of extension files written to disk in parallel
+    WRITE_WORKERS = 4
     
-    def __init__(self, output_dir: Optional[str] = None):
+    # Seconds to wait for GitHub before giving up on a request
+    REQUEST_TIMEOUT = 10
+    
+    # Remaining GitHub API requests below which the fetcher waits for the rate limit reset
+    RATE_LIMIT_THRESHOLD = 5
+    
+    def __init__(self, output_dir: Optional[str] = None, use_cache: bool = True):
         """
         Initialize the fetcher.
         
         Args:
             output_dir: Directory to save the fetched opcode definitions.
                        If None, saves to src/data/opcodes/
+            use_cache: Reuse the parsed opcodes of files whose content did not change
         """
         if output_dir is None:
             # Navigate to project root and then to data directory
@@ -34,118 +228,273 @@ class RiscVOpcodesFetcher:
         else:
             self.output_dir = Path(output_dir)
             
-        logger.debug(f"Output directory: {self.output_dir}")
+        logger.debug("Output directory: %s", self.output_dir)
         # Create output directory if it doesn't exist
         self.output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Define instruction parameter patterns based on RISC-V formats
+        # Parsed opcode files, keyed by the SHA-256 of their content and the parser version
+        self.use_cache = use_cache
+        self._cache_dir = self.output_dir / ".cache"
+        
+        # Shared session: keep-alive connections and retries on transient errors
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=16,
+            max_retries=Retry(total=5, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504])
+        )
+        self.session.mount("https://api.github.com", adapter)
+        self.session.mount("https://raw.githubusercontent.com", adapter)
+        
+        # Authenticated requests get 5000 API calls per hour instead of 60
+        token = os.getenv("GITHUB_TOKEN")
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+            self.session.headers["Accept"] = "application/vnd.github+json"
+        
+        # HTTP cache: bodies and validators of previous responses, so that
+        # unchanged files come back as HTTP 304
+        self.cache_dir = self.output_dir / ".http_cache"
+        
+        # SHA of the repository tree last listed by _get_extension_files
+        self._tree_sha = None
+        
+        # Define instruction parameter patterns based on RISC-V formats (tuples, shared by all the instructions)
         self.instruction_formats = {
             # R-Type: rd = rs1 op rs2
-            'R': ['rd', 'rs1', 'rs2'],
+            'R': ('rd', 'rs1', 'rs2'),
             # I-Type: rd = rs1 op imm OR rd = mem[rs1 + imm]
-            'I': ['rd', 'rs1', 'imm'],
+            'I': ('rd', 'rs1', 'imm'),
             # S-Type: mem[rs1 + imm] = rs2
-            'S': ['rs1', 'rs2', 'imm'],
+            'S': ('rs1', 'rs2', 'imm'),
             # B-Type: if (rs1 op rs2) pc += imm
-            'B': ['rs1', 'rs2', 'imm'],
+            'B': ('rs1', 'rs2', 'imm'),
             # U-Type: rd = imm
-            'U': ['rd', 'imm'],
+            'U': ('rd', 'imm'),
             # J-Type: rd = pc+4; pc += imm
-            'J': ['rd', 'imm']
+            'J': ('rd', 'imm')
         }
         
+    def _check_rate_limit(self, response) -> None:
+        """Wait for the rate limit reset when GitHub is about to reject further requests."""
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset = response.headers.get("X-RateLimit-Reset")
+        if remaining is None or reset is None or int(remaining) >= self.RATE_LIMIT_THRESHOLD:
+            return
+        
+        delay = max(0, int(reset) - time.time())
+        logger.warning("GitHub rate limit nearly exhausted (%s left), waiting %.0f seconds", remaining, delay)
+        time.sleep(delay)
+    
+    def _get(self, url: str, **kwargs):
+        """GET a URL on the shared session, pacing requests to GitHub's rate limits."""
+        response = self.session.get(url, timeout=self.REQUEST_TIMEOUT, **kwargs)
+        
+        # Secondary rate limits answer 403/429 with the time to wait before retrying
+        retry_after = response.headers.get("Retry-After")
+        if response.status_code in (403, 429) and retry_after and retry_after.isdigit():
+            logger.warning("GitHub asked to retry %s in %s seconds", url, retry_after)
+            response.close()
+            time.sleep(int(retry_after))
+            response = self.session.get(url, timeout=self.REQUEST_TIMEOUT, **kwargs)
+        
+        self._check_rate_limit(response)
+        return response
+    
+    def _http_cache_paths(self, url: str):
+        """Get the body and metadata files of the HTTP cache entry for a URL."""
+        key = hashlib.sha256(url.encode()).hexdigest()
+        return self.cache_dir / f"{key}.body", self.cache_dir / f"{key}.meta.json"
+    
+    def _conditional_get(self, url: str):
+        """
+        GET a URL, revalidating the cached copy if there is one.
+        
+        Returns the response and its body; on HTTP 304 the body is the cached one.
+        """
+        body_path, meta_path = self._http_cache_paths(url)
+        headers = {}
+        try:
+            meta = json.loads(meta_path.read_bytes())
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+        except (OSError, ValueError):
+            pass
+        
+        response = self._get(url, headers=headers)
+        logger.debug("Response status code: %s", response.status_code)
+        
+        if response.status_code == 304:
+            try:
+                logger.debug("%s not modified, using cached content", url)
+                return response, body_path.read_text(encoding="utf-8")
+            except OSError:
+                # Cache entry lost between the two reads, fetch the full response
+                response = self._get(url)
+        
+        if response.status_code == 200:
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            if etag or last_modified:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                body_path.write_text(response.text, encoding="utf-8")
+                meta_path.write_text(json.dumps({"etag": etag, "last_modified": last_modified}))
+        return response, response.text
+        
+
     def _get_extension_files(self) -> List[Dict]:
-        """Get list of extension files from the extensions directory."""
-        url = f"{self.BASE_URL}/extensions"
-        logger.debug(f"Fetching extension files from: {url}")
+        """Get list of extension files from the extensions directory, using a single git tree request."""
+        url = self.TREE_URL
+        logger.debug("Fetching extension files from: %s", url)
         try:
-            response = requests.get(url)
-            logger.debug(f"Response status code: {response.status_code}")
-            logger.debug(f"Response headers: {response.headers}")
+            response, body = self._conditional_get(url)
+            logger.debug("Response headers: %s", response.headers)
             
             if response.status_code == 403:
                 logger.error("GitHub API rate limit exceeded. Try again later or use a GitHub token.")
                 return []
                 
-            response.raise_for_status()
-            files = response.json()
-            logger.debug(f"Found {len(files)} files in extensions directory")
-            for file in files:
-                logger.debug(f"File: {file.get('name', 'unknown')}")
+            if response.status_code != 304:
+                response.raise_for_status()
+            
+            # Keep the files directly under extensions/, like a listing of the directory
+            tree = json.loads(body)
+            self._tree_sha = tree.get('sha')
+            files = []
+            for entry in tree.get('tree', []):
+                path = entry.get('path', '')
+                name = path[len(self.EXTENSIONS_DIR):]
+                if entry.get('type') == 'blob' and path.startswith(self.EXTENSIONS_DIR) and '/' not in name:
+                    files.append({'name': name, 'path': path})
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Found %d files in extensions directory", len(files))
+                for file in files:
+                    logger.debug("File: %s", file.get('name', 'unknown'))
             return files
         except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to fetch extension files: {e}")
+            logger.error("Failed to fetch extension files: %s", e)
             if hasattr(e.response, 'text'):
-                logger.error(f"Response text: {e.response.text}")
+                logger.error("Response text: %s", e.response.text)
             return []
             
     def _fetch_file_content(self, file_path: str) -> Optional[str]:
         """Fetch raw content of a file from the repository."""
         url = f"{self.RAW_BASE_URL}/{file_path}"
-        logger.debug(f"Fetching file content from: {url}")
+        logger.debug("Fetching file content from: %s", url)
         try:
-            response = requests.get(url)
-            logger.debug(f"Response status code: {response.status_code}")
+            response, content = self._conditional_get(url)
             
             if response.status_code == 403:
                 logger.error("GitHub API rate limit exceeded. Try again later or use a GitHub token.")
                 return None
                 
-            response.raise_for_status()
-            content = response.text
-            logger.debug(f"Fetched {len(content)} bytes of content")
+            if response.status_code != 304:
+                response.raise_for_status()
+            logger.debug("Fetched %d bytes of content", len(content))
             return content
         except requests.exceptions.RequestException as e:
-            logger.error(f"Failed to fetch file {file_path}: {e}")
+            logger.error("Failed to fetch file %s: %s", file_path, e)
             if hasattr(e.response, 'text'):
-                logger.error(f"Response text: {e.response.text}")
+                logger.error("Response text: %s", e.response.text)
+            return None
+    
+    def _fetch_extension_archive(self, extension_names: List[str],
+                                 tree_sha: Optional[str] = None) -> Dict[str, str]:
+        """
+        Download the repository tarball once and extract the given extension files.
+        
+        The extracted files are kept in the HTTP cache under the SHA of the repository
+        tree, so the archive is only downloaded again once the repository changes.
+        
+        Args:
+            extension_names: Names of the extension files to extract
+            tree_sha: SHA of the repository tree the files were listed from, if known
+        
+        Returns a dictionary mapping extension names to their content; it is empty
+        if the archive could not be fetched.
+        """
+        wanted = set(extension_names)
+        archive_cache = self.cache_dir / f"archive-{tree_sha}.json" if tree_sha else None
+        if archive_cache is not None:
+            try:
+                cached = json.loads(archive_cache.read_bytes())
+                logger.debug("Repository tree %s unchanged, using the cached archive files", tree_sha)
+                return {name: content for name, content in cached.items() if name in wanted}
+            except (OSError, ValueError):
+                pass
+        
+        contents = {}
+        logger.debug("Fetching repository archive from: %s", self.TARBALL_URL)
+        try:
+            with self._get(self.TARBALL_URL, stream=True) as response:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                
+                # Stream the archive: members are read in order without storing it on disk
+                with tarfile.open(fileobj=response.raw, mode='r|gz') as archive:
+                    for member in archive:
+                        # Members are prefixed by a "<owner>-<repo>-<sha>/" directory
+                        path = member.name.split('/', 1)[-1]
+                        name = path[len(self.EXTENSIONS_DIR):]
+                        if member.isfile() and path.startswith(self.EXTENSIONS_DIR) and name in wanted:
+                            contents[name] = archive.extractfile(member).read().decode('utf-8')
+        except (requests.exceptions.RequestException, tarfile.TarError, OSError) as e:
+            logger.warning("Failed to fetch repository archive, fetching files one by one: %s", e)
+            return {}
+        
+        logger.debug("Extracted %d extension files from the archive", len(contents))
+        if archive_cache is not None:
+            # Only the files of the latest tree are worth keeping
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            for old_cache in self.cache_dir.glob("archive-*.json"):
+                old_cache.unlink()
+            archive_cache.write_bytes(_dumps(contents))
+        return contents
+    
+    def _fetch_extension(self, extension_name: str, content: Optional[str] = None) -> Optional[Tuple[Dict, bytes]]:
+        """
+        Fetch (unless its content is given) and parse the opcodes of a single extension.
+        
+        Returns the opcodes and their serialized JSON, which is written to the
+        extension's own file and reused for the combined file.
+        """
+        logger.info("Fetching opcodes for extension: %s", extension_name)
+        
+        if content is None:
+            content = self._fetch_file_content(f"{self.EXTENSIONS_DIR}{extension_name}")
+        if not content:
+            logger.warning("No content fetched for %s", extension_name)
             return None
+        
+        opcodes, data = self._parse_opcode_file_cached(content)
+        if not opcodes:
+            logger.warning("No opcodes parsed for %s", extension_name)
+            return None
+        return opcodes, data
+    
+    def _save_extension(self, extension_name: str, data: bytes):
+        """Save the serialized opcodes of a single extension to its own file."""
+        output_file = self.output_dir / f"{extension_name}.json"
+        output_file.write_bytes(data)
+        logger.info("Saved opcodes for %s to %s", extension_name, output_file)
     
     def _determine_instruction_format(self, instruction_name: str, encoding: Dict) -> str:
         """
         Determine the instruction format based on the instruction name and encoding.
         """
-        # Known instruction format mappings
-        format_mappings = {
-            # R-Type instructions
-            'add': 'R', 'sub': 'R', 'sll': 'R', 'slt': 'R', 'sltu': 'R', 'xor': 'R',
-            'srl': 'R', 'sra': 'R', 'or': 'R', 'and': 'R', 'mul': 'R', 'mulh': 'R',
-            'mulhsu': 'R', 'mulhu': 'R', 'div': 'R', 'divu': 'R', 'rem': 'R', 'remu': 'R',
-            
-            # I-Type instructions
-            'addi': 'I', 'slti': 'I', 'sltiu': 'I', 'xori': 'I', 'ori': 'I', 'andi': 'I',
-            'slli': 'I', 'srli': 'I', 'srai': 'I', 'lb': 'I', 'lh': 'I', 'lw': 'I',
-            'lbu': 'I', 'lhu': 'I', 'jalr': 'I', 'ecall': 'I', 'ebreak': 'I',
-            
-            # S-Type instructions
-            'sb': 'S', 'sh': 'S', 'sw': 'S',
-            
-            # B-Type instructions
-            'beq': 'B', 'bne': 'B', 'blt': 'B', 'bge': 'B', 'bltu': 'B', 'bgeu': 'B',
-            
-            # U-Type instructions
-            'lui': 'U', 'auipc': 'U',
-            
-            # J-Type instructions
-            'jal': 'J'
-        }
-        
         # Check direct mapping first
-        if instruction_name in format_mappings:
-            return format_mappings[instruction_name]
-        
-        # Determine based on encoding fields
-        fields = encoding.get('fields', {})
-        has_funct7 = 'funct7' in encoding
-        has_funct3 = 'funct3' in encoding
-        has_opcode = 'opcode' in encoding
+        inst_format = _FORMAT_MAP.get(instruction_name)
+        if inst_format is not None:
+            return inst_format
         
         # R-Type: has funct7, funct3, opcode (register-to-register operations)
-        if has_funct7 and has_funct3 and has_opcode:
+        if 'funct7' in encoding and 'funct3' in encoding and 'opcode' in encoding:
             return 'R'
         
         # Check for instruction patterns
-        if instruction_name.endswith('i') and instruction_name not in ['lui']:
+        if instruction_name.endswith('i') and instruction_name not in _I_EXCLUDE:
             return 'I'  # Most immediate instructions
         
         if instruction_name.startswith('l') and len(instruction_name) <= 4:
@@ -154,7 +503,7 @@ class RiscVOpcodesFetcher:
         if instruction_name.startswith('s') and len(instruction_name) <= 4:
             return 'S'  # Store instructions
         
-        if instruction_name.startswith('b') and instruction_name not in ['beqz', 'bnez']:
+        if instruction_name.startswith('b') and instruction_name not in _B_EXCLUDE:
             return 'B'  # Branch instructions
         
         # Default fallback
@@ -163,39 +512,10 @@ class RiscVOpcodesFetcher:
     def _get_parameter_constraints(self, param: str) -> Dict:
         """
         Get parameter constraints for random generation.
-        """
-        constraints = {
-            'rd': {
-                'type': 'register',
-                'min': 0,
-                'max': 31,
-                'description': 'Destination register (x0-x31)',
-                'exclude': []  # Could exclude x0 for some instructions
-            },
-            'rs1': {
-                'type': 'register', 
-                'min': 0,
-                'max': 31,
-                'description': 'Source register 1 (x0-x31)',
-                'exclude': []
-            },
-            'rs2': {
-                'type': 'register',
-                'min': 0,
-                'max': 31, 
-                'description': 'Source register 2 (x0-x31)',
-                'exclude': []
-            },
-            'imm': {
-                'type': 'immediate',
-                'min': -2048,  # 12-bit signed immediate default
-                'max': 2047,
-                'description': 'Immediate value',
-                'bits': 12
-            }
-        }
         
-        return constraints.get(param, {'type': 'unknown'})
+        The constraints are shared between all the instructions and must not be modified.
+        """
+        return _PARAM_CONSTRAINTS.get(param, _UNKNOWN_CONSTRAINT)
 
     def _parse_opcode_file(self, content: str) -> Dict:
         """
@@ -206,118 +526,124 @@ class RiscVOpcodesFetcher:
         
         Returns a dictionary with instruction encoding information.
         """
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Parsing opcode file with %d lines", len(content.splitlines()))
+        
+        # Iterating over a StringIO yields the lines without building a list of them
+        return self._parse_opcode_lines(io.StringIO(content))
+    
+    def _parse_opcode_lines(self, lines) -> Dict:
+        """
+        Parse the lines of an opcode definition file, see _parse_opcode_file.
+        
+        Args:
+            lines: Iterable of lines, e.g. an open text file
+        """
         instructions = {}
-        logger.debug(f"Parsing opcode file with {len(content.splitlines())} lines")
         
-        for line_num, line in enumerate(content.split('\n'), 1):
-            line = line.strip()
-            if not line or line.startswith('#'):
+        for line_num, line in enumerate(lines, 1):
+            line_match = _LINE_RE.match(line)
+            if not line_match:
                 continue
-                
+            inst_name, rest = line_match.groups()
+            
+            # Parse instruction name and parameters from first part
+            # Format could be: "inst" or "inst rd,rs1,rs2" etc.
+            inst_params = []
+            
+            # Check if there are parameter specifications in the line
+            # Look for patterns like "rd,rs1,rs2" in the instruction part
+            if _NAME_PARAMS_RE.search(inst_name):
+                # Extract parameter names (rd, rs1, rs2, etc.)
+                inst_params = _PARAM_RE.findall(rest)
+            
+            # Parse the encoding; a line with a malformed field (e.g. 19..15=ignore) is
+            # skipped, rather than emitting the instruction with a wrong encoding
             try:
-                # Split into instruction and encoding parts
-                parts = line.split()
-                if not parts:
-                    continue
-                    
-                inst_part = parts[0]
-                encoding_parts = parts[1:]
-                
-                # Parse instruction name and parameters from first part
-                # Format could be: "inst" or "inst rd,rs1,rs2" etc.
-                inst_name = inst_part
-                inst_params = []
-                
-                # Check if there are parameter specifications in the line
-                # Look for patterns like "rd,rs1,rs2" in the instruction part
-                if ',' in inst_part or any(param in inst_part for param in ['rd', 'rs1', 'rs2', 'imm']):
-                    # Extract parameters from the instruction specification
-                    param_match = re.search(r'\s+(.*)', ' '.join(parts))
-                    if param_match:
-                        param_str = param_match.group(1)
-                        # Extract parameter names (rd, rs1, rs2, etc.)
-                        param_pattern = r'\b(rd|rs1|rs2|rs3|imm|shamt|csr)\b'
-                        inst_params = re.findall(param_pattern, param_str)
-                
-                logger.debug(f"Parsing instruction: {inst_name} with params: {inst_params} and {len(encoding_parts)} encoding parts")
-                
-                # Parse the encoding
-                encoding = {
-                    'fields': {},
-                }
-                for part in encoding_parts:
-                    if '=' in part:
-                        bits, value = part.split('=')
-                        value_int = int(value, 16)
-                        if '..' in bits:
-                            msb, lsb = map(int, bits.split('..'))
-                            encoding['fields'][f"{msb}..{lsb}"] = value_int
-                        else:
-                            bit = int(bits)
-                            encoding['fields'][str(bit)] = value_int
-                
-                # Combine fields for opcode, funct3, funct7 if present
-                fields = encoding['fields']
-                # Opcode: bits 6..0
-                if '6..2' in fields and '1..0' in fields:
-                    encoding['opcode'] = (fields['6..2'] << 2) | fields['1..0']
-                    del fields['6..2']
-                    del fields['1..0']
-                elif '6..0' in fields:
-                    encoding['opcode'] = fields['6..0']
-                    del fields['6..0']
-                # funct3: bits 14..12
-                if '14..12' in fields:
-                    encoding['funct3'] = fields['14..12']
-                    del fields['14..12']
-                # funct7: bits 31..25
-                if '31..25' in fields:
-                    encoding['funct7'] = fields['31..25']
-                    del fields['31..25']
-                
-                # Determine instruction format
-                inst_format = self._determine_instruction_format(inst_name, encoding)
-                
-                # If no parameters were found in the instruction line, use format defaults
-                if not inst_params and inst_format in self.instruction_formats:
-                    inst_params = self.instruction_formats[inst_format].copy()
-                
-                # Add parameter information
-                encoding['format'] = inst_format
-                encoding['parameters'] = []
-                
-                for param in inst_params:
-                    param_info = {
-                        'name': param,
-                        'constraints': self._get_parameter_constraints(param)
-                    }
-                    encoding['parameters'].append(param_info)
-                
-                # Add assembly template for test generation
-                if inst_params:
-                    template_params = []
-                    for param in inst_params:
-                        if param in ['rd', 'rs1', 'rs2', 'rs3']:
-                            template_params.append(f"x{{{param}}}")
-                        elif param in ['imm', 'shamt']:
-                            template_params.append(f"{{{param}}}")
-                        else:
-                            template_params.append(f"{{{param}}}")
-                    
-                    encoding['assembly_template'] = f"{inst_name} {', '.join(template_params)}"
-                else:
-                    encoding['assembly_template'] = inst_name
-                
-                instructions[inst_name] = encoding
-                logger.debug(f"Successfully parsed instruction: {inst_name} with format: {inst_format} and parameters: {[p['name'] for p in encoding['parameters']]}")
-                
-            except Exception as e:
-                logger.warning(f"Failed to parse line {line_num}: {line} - {e}")
+                fields = _parse_fields(rest)
+            except ValueError as e:
+                logger.warning("Failed to parse line %d: %s - %s", line_num, line.strip(), e)
                 continue
+            encoding = {
+                'fields': fields,
+            }
+            
+            # Combine fields for opcode, funct3, funct7 if present
+            # Opcode: bits 6..0
+            if (6, 2) in fields and (1, 0) in fields:
+                encoding['opcode'] = (fields.pop((6, 2)) << 2) | fields.pop((1, 0))
+            else:
+                opcode = fields.pop((6, 0), None)
+                if opcode is not None:
+                    encoding['opcode'] = opcode
+            # funct3: bits 14..12
+            funct3 = fields.pop((14, 12), None)
+            if funct3 is not None:
+                encoding['funct3'] = funct3
+            # funct7: bits 31..25
+            funct7 = fields.pop((31, 25), None)
+            if funct7 is not None:
+                encoding['funct7'] = funct7
+            
+            # Only the remaining fields need their "msb..lsb" names
+            encoding['fields'] = {
+                (f"{msb}..{lsb}" if lsb is not None else str(msb)): value
+                for (msb, lsb), value in fields.items()
+            }
+            
+            # Determine instruction format
+            inst_format = self._determine_instruction_format(inst_name, encoding)
+            
+            # If no parameters were found in the instruction line, use format defaults
+            if not inst_params and inst_format in self.instruction_formats:
+                inst_params = self.instruction_formats[inst_format]
+            
+            # Add parameter information
+            encoding['format'] = inst_format
+            encoding['parameters'] = [
+                _PARAM_INFO.get(param) or {'name': param, 'constraints': self._get_parameter_constraints(param)}
+                for param in inst_params
+            ]
+            
+            # Add assembly template for test generation
+            # Instructions of the same format share their operand list
+            if inst_params:
+                encoding['assembly_template'] = f"{inst_name} {_template_operands(tuple(inst_params))}"
+            else:
+                encoding['assembly_template'] = inst_name
+            
+            instructions[inst_name] = encoding
                 
-        logger.debug(f"Parsed {len(instructions)} instructions")
+        logger.debug("Parsed %d instructions", len(instructions))
         return instructions
         
+    def _parse_opcode_file_cached(self, content: str) -> Tuple[Dict, bytes]:
+        """
+        Parse an opcode definition file, reusing the result of a previous run if possible.
+        
+        Returns the opcodes and their serialized JSON.
+        """
+        if not self.use_cache:
+            opcodes = self._parse_opcode_file(content)
+            return opcodes, _dumps(opcodes)
+        
+        # Entries made by another version of the parser are never looked up
+        content_hash = hashlib.sha256(f"{PARSE_CACHE_VERSION}\n{content}".encode()).hexdigest()
+        cache_file = self._cache_dir / f"{content_hash}.json"
+        try:
+            data = cache_file.read_bytes()
+            opcodes = json.loads(data)
+            logger.debug("Loaded parsed opcodes from cache: %s", cache_file)
+            return opcodes, data
+        except (OSError, ValueError):
+            pass
+        
+        opcodes = self._parse_opcode_file(content)
+        data = _dumps(opcodes)
+        self._cache_dir.mkdir(parents=True, exist_ok=True)
+        cache_file.write_bytes(data)
+        return opcodes, data
+        
     def fetch_all_opcodes(self) -> Dict[str, Dict]:
         """
         Fetch and parse all opcode definitions.
@@ -331,32 +657,47 @@ class RiscVOpcodesFetcher:
             logger.error("No extension files found!")
             return all_opcodes
             
-        for file_info in extension_files:
-            # Remove the .txt extension check since files don't have extensions
-            extension_name = file_info['name']
-            logger.info(f"Fetching opcodes for extension: {extension_name}")
-            
-            content = self._fetch_file_content(f"extensions/{file_info['name']}")
-            if content:
-                opcodes = self._parse_opcode_file(content)
-                if opcodes:
-                    all_opcodes[extension_name] = opcodes
-                    
-                    # Save individual extension file
-                    output_file = self.output_dir / f"{extension_name}.json"
-                    with open(output_file, 'w') as f:
-                        json.dump(opcodes, f, indent=2)
-                    logger.info(f"Saved opcodes for {extension_name} to {output_file}")
-                else:
-                    logger.warning(f"No opcodes parsed for {extension_name}")
-            else:
-                logger.warning(f"No content fetched for {extension_name}")
+        # Remove the .txt extension check since files don't have extensions
+        extension_names = [file_info['name'] for file_info in extension_files]
         
-        # Save combined opcodes file
+        # Get all the files in one archive download; any file missing from it is
+        # fetched on its own. Those fetches are I/O bound, so run them in parallel
+        # and parse each file as it arrives. The combined file is streamed in the
+        # order of the extensions directory, so that the decoder still sees the same first match.
+        # Each extension's own file is written by a separate pool, so that disk
+        # writes never hold up the fetching and parsing of the next extensions.
+        contents = self._fetch_extension_archive(extension_names, self._tree_sha)
         combined_file = self.output_dir / "all_opcodes.json"
-        with open(combined_file, 'w') as f:
-            json.dump(all_opcodes, f, indent=2)
-        logger.info(f"Saved all opcodes to {combined_file}")
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS) as executor, \
+                ThreadPoolExecutor(max_workers=self.WRITE_WORKERS) as write_executor, \
+                _StreamingJSONWriter(combined_file) as writer:
+            futures = {executor.submit(self._fetch_extension, name, contents.get(name)): index
+                       for index, name in enumerate(extension_names)}
+            writes = []
+            results = {}
+            next_index = 0
+            for future in as_completed(futures):
+                index = futures[future]
+                results[index] = future.result()
+                if results[index]:
+                    writes.append(write_executor.submit(self._save_extension, extension_names[index], results[index][1]))
+                
+                # Write every extension whose predecessors are already written
+                while next_index in results:
+                    result = results.pop(next_index)
+                    if result:
+                        # Reuse the JSON of the extension's own file
+                        opcodes, data = result
+                        extension_name = extension_names[next_index]
+                        writer.write_serialized(extension_name, data)
+                        all_opcodes[extension_name] = opcodes
+                    next_index += 1
+            
+            # Surface any failed write
+            for write in writes:
+                write.result()
+        
+        logger.info("Saved all opcodes to %s", combined_file)
         
         return all_opcodes
 
@@ -365,7 +706,7 @@ def main():
     logger.info("Starting opcode fetch process")
     fetcher = RiscVOpcodesFetcher()
     opcodes = fetcher.fetch_all_opcodes()
-    logger.info(f"Fetch process completed. Found {len(opcodes)} extensions")
+    logger.info("Fetch process completed. Found %d extensions", len(opcodes))
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
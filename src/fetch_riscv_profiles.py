@@ -9,13 +9,23 @@ saves them both in yaml and json formats.
 import os
 import json
 import requests
-from github import Github
 from datetime import datetime
 from pathlib import Path
 import yaml
 import markdown
 from typing import Dict, List, Optional
 
+# LibYAML's C emitter when PyYAML was built with it
+try:
+    from yaml import CSafeDumper as _YAMLDumper
+except ImportError:
+    from yaml import SafeDumper as _YAMLDumper
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 class RISCvProfileFetcher:
     def __init__(self, output_dir: str = "profiles"):
         """Initialize the profile fetcher.
@@ -25,30 +35,65 @@ class RISCvProfileFetcher:
         """
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
-        self.github = Github()
         self.repo_name = "riscv/riscv-isa-manual"
+        self.api_url = f"https://api.github.com/repos/{self.repo_name}"
+        
+        # Plain REST calls on one session; a token raises the API rate limit
+        self.session = requests.Session()
+        self.session.headers["Accept"] = "application/vnd.github+json"
+        token = os.getenv("GITHUB_TOKEN")
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+        
+        # Latest release as returned by the API, cached with its ETag between runs
+        self.release_etag_file = self.output_dir / ".release.etag"
+        self.release_cache_file = self.output_dir / ".release.json"
+        self._release = None
+        
+    def _fetch_latest_release(self) -> Dict:
+        """Fetch the latest release JSON (including its assets) in a single API call."""
+        headers = {}
+        if self.release_etag_file.exists() and self.release_cache_file.exists():
+            headers["If-None-Match"] = self.release_etag_file.read_text().strip()
+        
+        response = self.session.get(f"{self.api_url}/releases/latest", headers=headers, timeout=10)
+        if response.status_code == 304:
+            with open(self.release_cache_file, 'r') as f:
+                return json.load(f)
+        
+        response.raise_for_status()
+        release = response.json()
+        with open(self.release_cache_file, 'w') as f:
+            json.dump(release, f)
+        if response.headers.get("ETag"):
+            self.release_etag_file.write_text(response.headers["ETag"])
+        return release
         
     def get_latest_release(self) -> Dict:
         """Get information about the latest release."""
-        repo = self.github.get_repo(self.repo_name)
-        latest_release = repo.get_latest_release()
+        self._release = self._fetch_latest_release()
+        published_at = datetime.fromisoformat(self._release["published_at"].replace("Z", "+00:00"))
         return {
-            "version": latest_release.tag_name,
-            "name": latest_release.title,
-            "published_at": latest_release.published_at.isoformat(),
-            "html_url": latest_release.html_url
+            "version": self._release["tag_name"],
+            "name": self._release["name"],
+            "published_at": published_at.isoformat(),
+            "html_url": self._release["html_url"]
         }
 
     def download_specification(self, release_info: Dict) -> Optional[str]:
         """Download the latest specification document."""
-        # The specification is typically in PDF format in the release assets
-        repo = self.github.get_repo(self.repo_name)
-        release = repo.get_release(release_info["version"])
+        # The specification is typically in PDF format in the release assets,
+        # which are already part of the release JSON
+        release = self._release
+        if release is None or release.get("tag_name") != release_info["version"]:
+            response = self.session.get(f"{self.api_url}/releases/tags/{release_info['version']}", timeout=10)
+            response.raise_for_status()
+            release = response.json()
         
         # Look for the PDF specification
         spec_asset = None
-        for asset in release.get_assets():
-            if asset.name.endswith('.pdf') and 'unpriv' in asset.name.lower():
+        for asset in release.get("assets", []):
+            if asset["name"].endswith('.pdf') and 'unpriv' in asset["name"].lower():
                 spec_asset = asset
                 break
         
@@ -56,14 +101,51 @@ class RISCvProfileFetcher:
             print("Warning: Could not find specification PDF in release assets")
             return None
             
-        # Download the specification
+        # Skip the download if the specification is already complete
         output_file = self.output_dir / f"riscv-spec-{release_info['version']}.pdf"
-        if not output_file.exists():
-            print(f"Downloading specification {spec_asset.name}...")
-            response = requests.get(spec_asset.browser_download_url)
-            with open(output_file, 'wb') as f:
-                f.write(response.content)
+        expected_size = spec_asset.get("size")
+        if output_file.exists() and (not expected_size or output_file.stat().st_size == expected_size):
+            return str(output_file)
+        
+        # Download to a partial file, resuming where an interrupted download stopped
+        partial_file = output_file.with_suffix(".pdf.part")
+        have = partial_file.stat().st_size if partial_file.exists() else 0
+        if expected_size and have > expected_size:
+            have = 0
+        
+        if not expected_size or have < expected_size:
+            headers = {"Accept": "application/octet-stream"}
+            if have:
+                headers["Range"] = f"bytes={have}-"
+                print(f"Resuming download of specification {spec_asset['name']} at {have} bytes...")
+            else:
+                print(f"Downloading specification {spec_asset['name']}...")
+            
+            # The read timeout applies between chunks, so a stalled transfer fails
+            # and leaves the partial file to resume from
+            with self.session.get(spec_asset["browser_download_url"], headers=headers, stream=True,
+                                  timeout=(10, 60)) as response:
+                if response.status_code == 416 and have:
+                    # Nothing past the partial file: it is complete, unless the server
+                    # reports another size in the "bytes */<size>" range header
+                    total = response.headers.get("Content-Range", "").rpartition("/")[2]
+                    if total.isdigit() and int(total) != have:
+                        print(f"Warning: Discarding partial specification download ({have} of {total} bytes)")
+                        partial_file.unlink()
+                        return None
+                else:
+                    response.raise_for_status()
+                    # Servers that ignore the range send the whole file again
+                    mode = 'ab' if response.status_code == 206 else 'wb'
+                    with open(partial_file, mode) as f:
+                        for chunk in response.iter_content(chunk_size=1 << 20):
+                            f.write(chunk)
+        
+        if expected_size and partial_file.stat().st_size != expected_size:
+            print(f"Warning: Incomplete specification download ({partial_file.stat().st_size} of {expected_size} bytes)")
+            return None
         
+        partial_file.replace(output_file)
         return str(output_file)
 
     def get_detailed_profiles(self) -> Dict:
@@ -242,11 +324,14 @@ class RISCvProfileFetcher:
         json_file = self.output_dir / "riscv-profiles.json"
         yaml_file = self.output_dir / "riscv-profiles.yaml"
         
-        with open(json_file, 'w') as f:
-            json.dump(profiles, f, indent=2)
+        with open(json_file, 'wb') as f:
+            if orjson is not None:
+                f.write(orjson.dumps(profiles, option=orjson.OPT_INDENT_2))
+            else:
+                f.write(json.dumps(profiles, indent=2).encode())
             
         with open(yaml_file, 'w') as f:
-            yaml.dump(profiles, f, default_flow_style=False)
+            yaml.dump(profiles, f, Dumper=_YAMLDumper, default_flow_style=False)
             
         print(f"Profile information saved to {json_file} and {yaml_file}")
         return profiles
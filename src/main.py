@@ -1,36 +1,95 @@
 import argparse
 import json
+import mmap
 import sys
 import os
 from pathlib import Path
 
 from classifier.profile_classifier import ProfileClassifier
 
-def print_instruction_details(instruction, verbose=False):
-    """Pretty print instruction details"""
-    print(f"Instruction: {instruction.get('instruction', 'Unknown')}")
-    print(f"Type: {instruction.get('type', 'Unknown')}")
-    print(f"Hex: {instruction.get('hex', 'Unknown')}")
-    print(f"Binary: {instruction.get('binary', 'Unknown')}")
-    print(f"Extension: {instruction.get('extension', 'Unknown')}")
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Number of pieces of instruction output buffered before writing them to stdout
+OUTPUT_BATCH_SIZE = 1024
+
+def print_instruction_details(instruction, verbose=False, out=None):
+    """
+    Pretty print instruction details
+    
+    Args:
+        instruction: Instruction details
+        verbose: Whether to show the encoding fields
+        out: List to append the text to instead of writing it to stdout
+    """
+    lines = [
+        f"Instruction: {instruction.get('instruction', 'Unknown')}",
+        f"Type: {instruction.get('type', 'Unknown')}",
+        f"Hex: {instruction.get('hex', 'Unknown')}",
+        f"Binary: {instruction.get('binary', 'Unknown')}",
+        f"Extension: {instruction.get('extension', 'Unknown')}",
+    ]
     
     if verbose:
-        print(f"Opcode: 0x{instruction.get('opcode', 0):02x}")
-        print(f"funct3: 0x{instruction.get('funct3', 0):01x}")
-        print(f"funct7: 0x{instruction.get('funct7', 0):02x}")
-        print(f"rd: x{instruction.get('rd', 0)}")
-        print(f"rs1: x{instruction.get('rs1', 0)}")
-        print(f"rs2: x{instruction.get('rs2', 0)}")
+        lines.append(f"Opcode: 0x{instruction.get('opcode', 0):02x}")
+        lines.append(f"funct3: 0x{instruction.get('funct3', 0):01x}")
+        lines.append(f"funct7: 0x{instruction.get('funct7', 0):02x}")
+        lines.append(f"rd: x{instruction.get('rd', 0)}")
+        lines.append(f"rs1: x{instruction.get('rs1', 0)}")
+        lines.append(f"rs2: x{instruction.get('rs2', 0)}")
         
         if "immediate" in instruction:
-            print(f"immediate: 0x{instruction['immediate'] & 0xFFFFFFFF:08x}")
+            lines.append(f"immediate: 0x{instruction['immediate'] & 0xFFFFFFFF:08x}")
     
     if "compatible_profiles" in instruction:
-        print("Compatible Profiles:")
+        lines.append("Compatible Profiles:")
         for profile in instruction["compatible_profiles"]:
-            print(f"  - {profile}")
+            lines.append(f"  - {profile}")
+    
+    text = "\n".join(lines) + "\n\n"
+    if out is None:
+        sys.stdout.write(text)
+    else:
+        out.append(text)
+
+def encode_json(data, default=None):
+    """Encode data as JSON indented by 2 spaces, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data, default=default, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, default=default).encode()
+
+def print_json(data, default=None):
+    """Print data as JSON indented by 2 spaces"""
+    sys.stdout.flush()
+    sys.stdout.buffer.write(encode_json(data, default) + b"\n")
+
+def print_result_json(result):
+    """
+    Print a classification result as JSON, same as print_json
+    
+    The instructions are encoded and written in batches, so that the JSON of
+    a large binary is never held in memory as a whole.
+    """
+    out = sys.stdout.buffer
+    sys.stdout.flush()
     
-    print()
+    # The instructions come first, indented by 4 spaces inside their list
+    chunks = [b'{\n  "instructions": [']
+    separator = b"\n    "
+    for instruction in result["instructions"]:
+        chunks.append(separator + encode_json(instruction).replace(b"\n", b"\n    "))
+        separator = b",\n    "
+        if len(chunks) >= OUTPUT_BATCH_SIZE:
+            out.write(b"".join(chunks))
+            chunks.clear()
+    chunks.append(b"\n  ]," if separator != b"\n    " else b"],")
+    
+    # Followed by the other keys, without the opening brace of their own object
+    rest = {key: value for key, value in result.items() if key != "instructions"}
+    chunks.append(encode_json(rest)[1:] + b"\n")
+    out.write(b"".join(chunks))
 
 def print_summary(result):
     """Print summary of results"""
@@ -88,31 +147,42 @@ def main():
         print_instruction_details(result, args.verbose)
     
     elif args.command == "binary":
-        # Read binary file
+        # Map binary file, so that it is not copied into memory before being decoded
         try:
             with open(args.file, "rb") as f:
-                binary_data = f.read()
+                if os.fstat(f.fileno()).st_size:
+                    binary_data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                else:
+                    # Empty files cannot be mapped
+                    binary_data = b""
         except Exception as e:
             print(f"Error: Failed to read file '{args.file}': {str(e)}")
             return 1
         
-        # Classify binary data
-        result = classifier.classify_binary(binary_data, args.offset)
+        # Classify binary data (the instructions are copied out of the mapping)
+        try:
+            result = classifier.classify_binary(binary_data, args.offset, args.limit or None)
+        finally:
+            if isinstance(binary_data, mmap.mmap):
+                binary_data.close()
         
         if args.json:
-            # Output as JSON
-            print(json.dumps(result, indent=2))
+            # Output as JSON (the instructions are a lazy sequence)
+            print_result_json(result)
         else:
-            # Print each instruction
-            for i, instruction in enumerate(result["instructions"]):
-                if args.limit and i >= args.limit:
-                    break
-                
+            # Print each instruction, writing them in batches
+            out = []
+            for instruction in result["instructions"]:
                 if "error" in instruction:
-                    print(f"Error at offset {instruction.get('offset', 'unknown')}: {instruction['error']}")
+                    out.append(f"Error at offset {instruction.get('offset', 'unknown')}: {instruction['error']}\n")
                 else:
-                    print(f"Offset {instruction['offset']}:")
-                    print_instruction_details(instruction, args.verbose)
+                    out.append(f"Offset {instruction['offset']}:\n")
+                    print_instruction_details(instruction, args.verbose, out)
+                
+                if len(out) >= OUTPUT_BATCH_SIZE:
+                    sys.stdout.write("".join(out))
+                    out.clear()
+            sys.stdout.write("".join(out))
             
             # Print summary
             print_summary(result)
@@ -120,7 +190,7 @@ def main():
     elif args.command == "hexfile":
         # Read hex file
         try:
-            with open(args.file, "r") as f:
+            with open(args.file, "rb") as f:
                 hex_content = f.read()
         except Exception as e:
             print(f"Error: Failed to read file '{args.file}': {str(e)}")
@@ -131,15 +201,21 @@ def main():
         
         if args.json:
             # Output as JSON
-            print(json.dumps(result, indent=2))
+            print_result_json(result)
         else:
-            # Print each instruction
+            # Print each instruction, writing them in batches
+            out = []
             for instruction in result["instructions"]:
                 if "error" in instruction:
-                    print(f"Error at line {instruction.get('line', 'unknown')}: {instruction['error']}")
+                    out.append(f"Error at line {instruction.get('line', 'unknown')}: {instruction['error']}\n")
                 else:
-                    print(f"Line {instruction['line']}:")
-                    print_instruction_details(instruction, args.verbose)
+                    out.append(f"Line {instruction['line']}:\n")
+                    print_instruction_details(instruction, args.verbose, out)
+                
+                if len(out) >= OUTPUT_BATCH_SIZE:
+                    sys.stdout.write("".join(out))
+                    out.clear()
+            sys.stdout.write("".join(out))
             
             # Print summary
             print_summary(result)
@@ -158,7 +234,7 @@ def main():
             
             if args.json:
                 # Output as JSON
-                print(json.dumps(profile_details, indent=2))
+                print_json(profile_details)
             else:
                 # Print profile details
                 print(f"Profile: {profile_details['profile']} - {profile_details['name']}")
@@ -178,7 +254,7 @@ def main():
             
             if args.json:
                 # Output the entire raw dataset to exactly mirror riscv-profiles.json
-                print(json.dumps(classifier.profiles_db.get_raw_dataset(), indent=2))
+                print_json(classifier.profiles_db.get_raw_dataset())
             else:
                 # Print profiles
                 print("Available RISC-V Profiles:")
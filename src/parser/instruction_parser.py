@@ -1,28 +1,73 @@
 import struct
 import json
 import os
+import sys
+import pickle
+import tempfile
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Version of the cached database layout, to bump whenever _load_opcodes changes what it builds
+CACHE_VERSION = 2
+
+def _is_reserved_compressed(halfword):
+    """
+    Check whether a 16-bit halfword is an illegal or reserved RVC encoding
+    
+    The all-zero halfword is the defined illegal instruction, and the
+    encodings below are reserved by the C extension whatever the opcodes
+    database says about their quadrant and funct3.
+    """
+    quadrant = halfword & 0x3
+    funct3 = (halfword >> 13) & 0x7
+    if quadrant == 0 and funct3 == 0:
+        # c.addi4spn with nzuimm=0, including the all-zero illegal instruction
+        return (halfword >> 5) & 0xFF == 0
+    if quadrant == 1 and funct3 == 3:
+        # c.addi16sp and c.lui with nzimm=0
+        return halfword & 0x107C == 0
+    if quadrant == 2 and funct3 == 2:
+        # c.lwsp with rd=0
+        return (halfword >> 7) & 0x1F == 0
+    if quadrant == 2 and funct3 == 4:
+        # c.jr with rs1=0
+        return halfword & 0x1FFC == 0
+    return False
+
 class RiscVInstructionParser:
     def __init__(self):
         self.opcodes_db = {}
+        self.decode_map = {}
         self._load_opcodes()
-        # Debug: print all loaded extension names
-        print(f"[DEBUG] Loaded extension names: {list(self.opcodes_db.keys())}")
     
     def _load_opcodes(self):
         """Load all opcode files from the opcodes directory"""
         opcodes_dir = Path(__file__).parent.parent / "data" / "opcodes"
+        opcodes_file = opcodes_dir / "all_opcodes.json"
+        cache_file = opcodes_dir / "all_opcodes.cache.pkl"
+        
+        # Reuse the processed database while all_opcodes.json is unchanged
+        try:
+            stat = opcodes_file.stat()
+            signature = (CACHE_VERSION, stat.st_size, stat.st_mtime_ns)
+        except OSError:
+            signature = None
+        if signature and self._load_cache(cache_file, signature):
+            return
         
         # Load all_opcodes.json
         try:
-            with open(opcodes_dir / "all_opcodes.json", 'r') as f:
-                data = json.load(f)
+            with open(opcodes_file, 'rb') as f:
+                data = orjson.loads(f.read()) if orjson is not None else json.load(f)
                 
                 # Process each extension
                 for ext_name, ext_data in data.items():
-                    # Extract base extension name (e.g., rv32_i -> I)
-                    base_ext = ext_name.split('_')[-1].upper()
+                    # Extract base extension name (e.g., rv32_i -> I), interned like the instruction names
+                    base_ext = sys.intern(ext_name.split('_')[-1].upper())
                     
                     # Process each instruction in the extension
                     for instr_name, instr_data in ext_data.items():
@@ -32,22 +77,94 @@ class RiscVInstructionParser:
                             
                         # Create instruction entry
                         instr_entry = {
-                            'instruction': instr_name,
+                            'instruction': sys.intern(instr_name),
                             'extension': base_ext,
                             'opcode': instr_data.get('opcode'),
                             'funct3': instr_data.get('funct3'),
                             'funct7': instr_data.get('funct7'),
                             'type': self._determine_instruction_type(instr_data)
                         }
+                        # Settle the type here, so that decoding never has to determine it
+                        if instr_entry['type'] == 'Unknown':
+                            instr_entry['type'] = self._determine_instruction_type(instr_entry)
+                        
+                        # Compressed instructions have no 7-bit opcode, keep their bit patterns
+                        fields = instr_data.get('fields', {})
+                        if instr_entry['opcode'] is None and fields.get('1..0', 3) != 3:
+                            instr_entry['compressed_fields'] = [
+                                self._parse_bit_range(bits) + (value,) for bits, value in fields.items()
+                            ]
                         
                         # Add to database
                         if base_ext not in self.opcodes_db:
                             self.opcodes_db[base_ext] = []
                         self.opcodes_db[base_ext].append(instr_entry)
+            
+            self._build_decode_map()
                         
         except Exception as e:
             print(f"Warning: Failed to load all_opcodes.json: {e}")
             self.opcodes_db = {}
+            self.decode_map = {}
+            return
+        
+        if signature:
+            self._save_cache(cache_file, signature)
+    
+    def _load_cache(self, cache_file, signature):
+        """Load the database cached for the given all_opcodes.json signature, returns whether it was loaded"""
+        try:
+            with open(cache_file, 'rb') as f:
+                cached_signature, opcodes_db, decode_map = pickle.load(f)
+        except Exception:
+            return False
+        if cached_signature != signature:
+            return False
+        self.opcodes_db = opcodes_db
+        self.decode_map = decode_map
+        return True
+    
+    def _save_cache(self, cache_file, signature):
+        """Save the database next to all_opcodes.json, replacing any previous cache atomically"""
+        try:
+            with tempfile.NamedTemporaryFile('wb', dir=cache_file.parent, suffix='.tmp', delete=False) as f:
+                pickle.dump((signature, self.opcodes_db, self.decode_map), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f.name, cache_file)
+        except Exception as e:
+            print(f"Warning: Failed to cache the opcodes database: {e}")
+            try:
+                os.unlink(f.name)
+            except Exception:
+                pass
+    
+    def _build_decode_map(self):
+        """Index the instructions by (opcode, funct3, funct7), None meaning any value"""
+        self.decode_map = {}
+        position = 0
+        for ext, opcodes in self.opcodes_db.items():
+            for instr in opcodes:
+                if instr.get('opcode') is not None:
+                    key = (instr['opcode'], instr.get('funct3'), instr.get('funct7'))
+                    # Keep the first instruction in database order, like a linear search would
+                    self.decode_map.setdefault(key, (position, ext, instr))
+                position += 1
+    
+    def _lookup(self, opcode, funct3, funct7):
+        """Find the first instruction matching the fields, returns (extension, instruction) or None"""
+        decode_map = self.decode_map
+        matches = [match for match in (decode_map.get((opcode, funct3, funct7)),
+                                       decode_map.get((opcode, funct3, None)),
+                                       decode_map.get((opcode, None, funct7)),
+                                       decode_map.get((opcode, None, None))) if match]
+        if not matches:
+            return None
+        _, ext, instr = min(matches, key=lambda match: match[0])
+        return ext, instr
+    
+    def _parse_bit_range(self, bits):
+        """Convert a field name like '15..13' or '12' into a (msb, lsb) tuple"""
+        msb, _, lsb = bits.partition('..')
+        return (int(msb), int(lsb or msb))
     
     def _determine_instruction_type(self, instr_data):
         """Determine instruction type based on fields or fallback mapping"""
@@ -102,65 +219,87 @@ class RiscVInstructionParser:
         funct3 = (instruction_int >> 12) & 0x7
         funct7 = (instruction_int >> 25) & 0x7F
         
-        # Debug print: show extracted fields
-        print(f"[DEBUG] Parsed instruction: 0x{instruction_int:08x} opcode={opcode} funct3={funct3} funct7={funct7}")
-        
-        # Debug print: show loaded opcodes for each extension
-        for ext in self.opcodes_db:
-            print(f"[DEBUG] Searching extension: {ext}")
-            for instr in self.opcodes_db[ext]:
-                print(f"  {instr['instruction']}: opcode={instr.get('opcode')} funct3={instr.get('funct3')} funct7={instr.get('funct7')}")
-        
-        # Extract register fields
-        rd = (instruction_int >> 7) & 0x1F
-        rs1 = (instruction_int >> 15) & 0x1F
-        rs2 = (instruction_int >> 20) & 0x1F
-        
         # Try to find matching instruction in opcodes database
-        instruction_info = None
-        extension = None
-        
-        # Search through all extensions
-        for ext, opcodes in self.opcodes_db.items():
-            for instr in opcodes:
-                if (instr.get('opcode') == opcode and 
-                    (instr.get('funct3') is None or instr.get('funct3') == funct3) and
-                    (instr.get('funct7') is None or instr.get('funct7') == funct7)):
-                    instruction_info = instr
-                    extension = ext
-                    break
-            if instruction_info:
-                break
+        match = self._lookup(opcode, funct3, funct7)
         
-        if not instruction_info:
+        if not match:
+            # Register fields are only extracted here, describe_instruction does it for known instructions
             return {
                 "error": "Unknown instruction",
                 "opcode": opcode,
                 "funct3": funct3,
                 "funct7": funct7,
-                "rd": rd,
-                "rs1": rs1,
-                "rs2": rs2,
+                "rd": (instruction_int >> 7) & 0x1F,
+                "rs1": (instruction_int >> 15) & 0x1F,
+                "rs2": (instruction_int >> 20) & 0x1F,
                 "hex": f"{instruction_int:08x}",
                 "binary": f"{instruction_int:032b}",
                 "extension": "Unknown"
             }
         
-        # Set the type field using the improved _determine_instruction_type method
+        extension, instruction_info = match
+        return self.describe_instruction(instruction_int, instruction_info, extension)
+
+    def parse_compressed(self, halfword):
+        """Parse a 16-bit compressed (RVC) instruction"""
+        if _is_reserved_compressed(halfword):
+            error = "Illegal instruction" if halfword == 0 else "Reserved compressed instruction"
+            return self._compressed_error(halfword, error)
+        
+        for ext, opcodes in self.opcodes_db.items():
+            for instr in opcodes:
+                fields = instr.get('compressed_fields')
+                if fields and all((halfword >> lsb) & ((1 << (msb - lsb + 1)) - 1) == value
+                                  for msb, lsb, value in fields):
+                    return self.describe_compressed_instruction(halfword, instr, ext)
+        
+        return self._compressed_error(halfword, "Unknown compressed instruction")
+
+    def _compressed_error(self, halfword, error):
+        """Build the details of a 16-bit instruction that cannot be decoded"""
+        return {
+            "error": error,
+            "opcode": halfword & 0x3,
+            "funct3": (halfword >> 13) & 0x7,
+            "rd": (halfword >> 7) & 0x1F,
+            "rs1": (halfword >> 7) & 0x1F,
+            "rs2": (halfword >> 2) & 0x1F,
+            "hex": f"{halfword:04x}",
+            "binary": f"{halfword:016b}",
+            "extension": "Unknown"
+        }
+
+    def describe_compressed_instruction(self, halfword, instruction_info, extension):
+        """Build the details of a 16-bit instruction already matched against the opcodes database"""
         instr_type = instruction_info.get('type')
         if not instr_type or instr_type == 'Unknown':
-            instr_type = self._determine_instruction_type(instruction_info)
+            instr_type = 'C-Type'
         
-        # Build instruction details
-        result = {
+        return {
             "instruction": instruction_info.get('instruction', 'Unknown'),
             "type": instr_type,
-            "opcode": opcode,
-            "funct3": funct3,
-            "funct7": funct7,
-            "rd": rd,
-            "rs1": rs1,
-            "rs2": rs2,
+            "opcode": halfword & 0x3,
+            "funct3": (halfword >> 13) & 0x7,
+            "rd": (halfword >> 7) & 0x1F,
+            "rs1": (halfword >> 7) & 0x1F,
+            "rs2": (halfword >> 2) & 0x1F,
+            "hex": f"{halfword:04x}",
+            "binary": f"{halfword:016b}",
+            "extension": extension
+        }
+
+    def describe_instruction(self, instruction_int, instruction_info, extension):
+        """Build the details of an instruction already matched against the opcodes database"""
+        # Build instruction details (the type was already determined by _load_opcodes)
+        result = {
+            "instruction": instruction_info.get('instruction', 'Unknown'),
+            "type": instruction_info['type'],
+            "opcode": instruction_int & 0x7F,
+            "funct3": (instruction_int >> 12) & 0x7,
+            "funct7": (instruction_int >> 25) & 0x7F,
+            "rd": (instruction_int >> 7) & 0x1F,
+            "rs1": (instruction_int >> 15) & 0x1F,
+            "rs2": (instruction_int >> 20) & 0x1F,
             "hex": f"{instruction_int:08x}",
             "binary": f"{instruction_int:032b}",
             "extension": extension
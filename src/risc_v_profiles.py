@@ -1,7 +1,21 @@
 import json
 import os
+from functools import lru_cache
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _dump_json(data, filepath):
+    """Write data to a JSON file indented by 2 spaces, using orjson when it is installed"""
+    with open(filepath, 'wb') as f:
+        if orjson is not None:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+        else:
+            f.write(json.dumps(data, indent=2).encode())
+
 class RiscVProfiles:
     def __init__(self):
         self.profiles = {}
@@ -9,6 +23,15 @@ class RiscVProfiles:
         self.metadata = {}
         self.raw_data = None
         self.profiles_file_path = None
+        # Incremented on every change, so that callers can cache lookups
+        self.version = 0
+        # Mandatory extensions of each profile as a bitmask, see _get_profile_masks
+        self._extension_bits = {}
+        self._profile_masks = {}
+        self._masks_version = None
+        # Lookups are cached until the next change, see _changed
+        self._profile_details_cached = lru_cache(maxsize=512)(self._get_profile_details)
+        self.get_extension_details = lru_cache(maxsize=512)(self._get_extension_details)
         self._load_profiles()
     
     def _load_profiles(self):
@@ -17,12 +40,13 @@ class RiscVProfiles:
         self.profiles_file_path = str(profiles_file)
         
         try:
-            with open(profiles_file, 'r') as f:
-                data = json.load(f)
+            with open(profiles_file, 'rb') as f:
+                data = orjson.loads(f.read()) if orjson is not None else json.load(f)
                 self.raw_data = data
                 self.metadata = data.get('metadata', {})
                 self.profiles = data.get('profiles', {})
                 self.extensions = data.get('extensions', {})
+                self._changed()
         except Exception as e:
             print(f"Warning: Failed to load profiles from {profiles_file}: {e}")
     
@@ -30,8 +54,20 @@ class RiscVProfiles:
         """Get all available profiles"""
         return self.profiles
     
+    def _changed(self):
+        """Record a change to the database, dropping the cached lookups"""
+        self.version += 1
+        self._profile_details_cached.cache_clear()
+        self.get_extension_details.cache_clear()
+    
     def get_profile_details(self, profile_name):
         """Get details for a specific profile"""
+        # The cached details are copied, so that callers can modify their result
+        details = self._profile_details_cached(profile_name)
+        return dict(details) if details is not None else None
+    
+    def _get_profile_details(self, profile_name):
+        """Build the details of a profile, see get_profile_details"""
         profile = self.profiles.get(profile_name)
         if not profile:
             return None
@@ -46,7 +82,7 @@ class RiscVProfiles:
             "typical_use": profile.get('typical_use', '')
         }
     
-    def get_extension_details(self, extension_name):
+    def _get_extension_details(self, extension_name):
         """Get details for a specific extension"""
         extension = self.extensions.get(extension_name)
         if not extension:
@@ -54,19 +90,31 @@ class RiscVProfiles:
         
         return extension.get('description', '')
     
+    def _get_profile_masks(self):
+        """Get the mandatory extensions bitmask of every profile, rebuilt when the database changes"""
+        if self._masks_version != self.version:
+            self._extension_bits = {}
+            self._profile_masks = {}
+            for profile_name, profile in self.profiles.items():
+                mask = 0
+                for ext in profile.get('mandatory_extensions', []):
+                    mask |= self._extension_bits.setdefault(ext, 1 << len(self._extension_bits))
+                self._profile_masks[profile_name] = mask
+            self._masks_version = self.version
+        return self._profile_masks
+    
     def get_compatible_profiles(self, extensions):
         """Get all profiles that are compatible with the given extensions"""
-        compatible_profiles = []
+        profile_masks = self._get_profile_masks()
         
-        for profile_name, profile in self.profiles.items():
-            # Get all mandatory extensions for this profile
-            mandatory_extensions = set(profile.get('mandatory_extensions', []))
-            
-            # Check if all mandatory extensions are present
-            if mandatory_extensions.issubset(set(extensions)):
-                compatible_profiles.append(profile_name)
+        # Extensions that no profile requires cannot make a difference
+        extensions_mask = 0
+        for ext in extensions:
+            extensions_mask |= self._extension_bits.get(ext, 0)
         
-        return compatible_profiles
+        # Check if all mandatory extensions are present
+        return [profile_name for profile_name, mask in profile_masks.items()
+                if mask & extensions_mask == mask]
 
     def get_raw_dataset(self):
         """Return the entire dataset exactly as in riscv-profiles.json (including metadata)."""
@@ -115,8 +163,7 @@ class RiscVProfiles:
                 extension_data["standard"][ext_name] = ext_desc
         
         # Save to file
-        with open(filepath, 'w') as f:
-            json.dump(extension_data, f, indent=2)
+        _dump_json(extension_data, filepath)
     
     def save_profiles(self, filepath=None):
         """Save profiles to a JSON file"""
@@ -153,23 +200,26 @@ class RiscVProfiles:
                 profile_data["classic"][profile_name] = profile
         
         # Save to file
-        with open(filepath, 'w') as f:
-            json.dump(profile_data, f, indent=2)
+        _dump_json(profile_data, filepath)
     
     def add_extension(self, name, description):
         """Add a new extension to the database"""
         self.extensions[name] = description
+        self._changed()
         
     def add_profile(self, name, profile_data):
         """Add a new profile to the database"""
         self.profiles[name] = profile_data
+        self._changed()
         
     def remove_extension(self, name):
         """Remove an extension from the database"""
         if name in self.extensions:
             del self.extensions[name]
+            self._changed()
             
     def remove_profile(self, name):
         """Remove a profile from the database"""
         if name in self.profiles:
-            del self.profiles[name] 
\ No newline at end of file
+            del self.profiles[name]
+            self._changed()
\ No newline at end of file
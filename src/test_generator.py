@@ -1,11 +1,45 @@
 import json
 import random
+import string
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 import logging
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+@lru_cache(maxsize=64)
+def _allowed_registers(min_val: int, max_val: int, exclude: Tuple[int, ...]) -> Tuple[int, ...]:
+    """Get the register numbers from min_val to max_val that are not excluded."""
+    excluded = set(exclude)
+    return tuple(r for r in range(min_val, max_val + 1) if r not in excluded)
+
+@lru_cache(maxsize=256)
+def _positional_template(template: str, names: Tuple[str, ...]) -> Optional[str]:
+    """
+    Turn an assembly template with named fields into one taking the parameter values in order.
+    
+    Returns None when the template uses a field that is not one of the parameters,
+    or when a parameter name repeats, as the named format only sees its last value.
+    """
+    if len(set(names)) != len(names):
+        return None
+    parts = []
+    for literal, field, spec, conversion in string.Formatter().parse(template):
+        parts.append(literal.replace('{', '{{').replace('}', '}}'))
+        if field is None:
+            continue
+        if field not in names or '{' in spec:
+            return None
+        parts.append('{' + str(names.index(field)) + ('!' + conversion if conversion else '')
+                     + (':' + spec if spec else '') + '}')
+    return ''.join(parts)
+
 class RiscVTestGenerator:
     """Generates random test cases for RISC-V instructions using opcode metadata."""
     
@@ -28,45 +62,68 @@ class RiscVTestGenerator:
     def _load_opcodes(self):
         """Load all opcode definitions from the opcodes directory."""
         try:
-            with open(self.opcodes_dir / "all_opcodes.json", 'r') as f:
-                self.opcodes_db = json.load(f)
+            with open(self.opcodes_dir / "all_opcodes.json", 'rb') as f:
+                self.opcodes_db = orjson.loads(f.read()) if orjson is not None else json.load(f)
             logger.info(f"Loaded opcodes for {len(self.opcodes_db)} extensions")
         except Exception as e:
             logger.error(f"Failed to load opcodes: {e}")
             self.opcodes_db = {}
+        self._build_index()
     
-    def get_available_instructions(self) -> List[str]:
-        """Get a list of all available instruction names."""
-        instructions = []
+    def _build_index(self):
+        """Index the instructions by name and by format."""
+        # Instruction info with its extension; the first extension defining a name wins
+        self._instr_index = {}
+        # Instruction names of each format, in database order; an instruction defined
+        # by several extensions appears once per extension
+        by_format = {}
         for ext_name, ext_data in self.opcodes_db.items():
-            for instr_name in ext_data.keys():
+            for instr_name, instr_info in ext_data.items():
+                if instr_name not in self._instr_index:
+                    self._instr_index[instr_name] = {**instr_info, 'extension': ext_name}
                 if not instr_name.startswith('$'):  # Skip pseudo-ops
-                    instructions.append(instr_name)
-        return sorted(set(instructions))
+                    by_format.setdefault(instr_info.get('format', 'Unknown'), []).append(instr_name)
+        # Tuples, so that they can be handed out without copies
+        self._by_format = {format_type: tuple(instrs) for format_type, instrs in by_format.items()}
+        self._sorted_names = sorted(name for name in self._instr_index if not name.startswith('$'))
+    
+    def get_available_instructions(self) -> List[str]:
+        """Get a list of all available instruction names."""
+        return list(self._sorted_names)
+    
+    def get_instructions_by_format(self) -> Dict[str, Tuple[str, ...]]:
+        """Get the instruction names of each format, in database order."""
+        return dict(self._by_format)
     
     def get_instruction_info(self, instruction_name: str) -> Optional[Dict]:
         """Get detailed information about a specific instruction."""
-        for ext_name, ext_data in self.opcodes_db.items():
-            if instruction_name in ext_data:
-                info = ext_data[instruction_name].copy()
-                info['extension'] = ext_name
-                return info
-        return None
+        info = self._instr_index.get(instruction_name)
+        return dict(info) if info is not None else None
     
-    def _generate_random_register(self, constraints: Dict) -> int:
-        """Generate a random register number within constraints."""
-        min_val = constraints.get('min', 0)
-        max_val = constraints.get('max', 31)
-        exclude = constraints.get('exclude', [])
+    def _get_instruction_entry(self, instruction_name: str) -> Optional[Dict]:
+        """
+        Get the index entry of an instruction, see get_instruction_info.
         
-        available = [r for r in range(min_val, max_val + 1) if r not in exclude]
-        return random.choice(available) if available else 0
+        The entry is not copied, so it is only for callers that just read it,
+        and must not be modified.
+        """
+        return self._instr_index.get(instruction_name)
     
-    def _generate_random_immediate(self, constraints: Dict) -> int:
-        """Generate a random immediate value within constraints."""
+    def _get_allowed_registers(self, constraints: Dict) -> Tuple[int, ...]:
+        """Get the registers allowed by constraints, computed once per distinct constraints."""
+        return _allowed_registers(constraints.get('min', 0), constraints.get('max', 31),
+                                  tuple(constraints.get('exclude', [])))
+    
+    def _generate_random_registers(self, constraints: Dict, count: int) -> List[int]:
+        """Generate count random register numbers within constraints in one call."""
+        available = self._get_allowed_registers(constraints)
+        return random.choices(available, k=count) if available else [0] * count
+    
+    def _generate_random_immediates(self, constraints: Dict, count: int) -> List[int]:
+        """Generate count random immediate values within constraints in one call."""
         min_val = constraints.get('min', -2048)
         max_val = constraints.get('max', 2047)
-        return random.randint(min_val, max_val)
+        return random.choices(range(min_val, max_val + 1), k=count)
     
     def _adjust_immediate_for_format(self, value: int, inst_format: str) -> int:
         """Adjust immediate value based on instruction format constraints."""
@@ -96,48 +153,60 @@ class RiscVTestGenerator:
         Returns:
             List of test case dictionaries containing instruction and parameters
         """
-        instr_info = self.get_instruction_info(instruction_name)
+        # The index entry is only read here, so it is not copied
+        instr_info = self._get_instruction_entry(instruction_name)
         if not instr_info:
             logger.error(f"Instruction '{instruction_name}' not found")
             return []
         
+        # Everything that does not change between test cases is looked up once
+        inst_format = instr_info.get('format', 'Unknown')
+        parameters = instr_info.get('parameters', [])
+        template = instr_info.get('assembly_template', instruction_name)
+        description = f"Random test case for {instruction_name}"
+        
+        # Generate the random values of each parameter for all the test cases at once
+        names = []
+        columns = []
+        for param in parameters:
+            constraints = param['constraints']
+            names.append(param['name'])
+            if constraints['type'] == 'register':
+                columns.append(self._generate_random_registers(constraints, count))
+            elif constraints['type'] == 'immediate':
+                # Adjust immediate based on instruction format
+                adjust_immediate = self._adjust_immediate_for_format
+                columns.append([adjust_immediate(value, inst_format)
+                                for value in self._generate_random_immediates(constraints, count)])
+            else:
+                columns.append([0] * count)
+        rows = zip(*columns) if columns else [()] * count
+        
+        # The template is parsed once and then filled in with each row of values
+        positional = _positional_template(template, tuple(names))
+        
         test_cases = []
-        for _ in range(count):
-            test_case = {
-                'instruction': instruction_name,
-                'format': instr_info.get('format', 'Unknown'),
-                'parameters': {},
-                'assembly': '',
-                'description': f"Random test case for {instruction_name}"
-            }
-            
-            # Generate random values for each parameter
-            parameters = instr_info.get('parameters', [])
-            for param in parameters:
-                param_name = param['name']
-                constraints = param['constraints']
-                
-                if constraints['type'] == 'register':
-                    value = self._generate_random_register(constraints)
-                    test_case['parameters'][param_name] = value
-                elif constraints['type'] == 'immediate':
-                    value = self._generate_random_immediate(constraints)
-                    # Adjust immediate based on instruction format
-                    value = self._adjust_immediate_for_format(value, test_case['format'])
-                    test_case['parameters'][param_name] = value
-                else:
-                    test_case['parameters'][param_name] = 0
+        append = test_cases.append
+        for row in rows:
+            values = dict(zip(names, row))
             
             # Generate assembly string using template
-            template = instr_info.get('assembly_template', instruction_name)
-            try:
-                assembly = template.format(**test_case['parameters'])
-                test_case['assembly'] = assembly
-            except KeyError as e:
-                logger.warning(f"Template parameter missing: {e}")
-                test_case['assembly'] = instruction_name
+            if positional is not None:
+                assembly = positional.format(*row)
+            else:
+                try:
+                    assembly = template.format(**values)
+                except KeyError as e:
+                    logger.warning(f"Template parameter missing: {e}")
+                    assembly = instruction_name
             
-            test_cases.append(test_case)
+            append({
+                'instruction': instruction_name,
+                'format': inst_format,
+                'parameters': values,
+                'assembly': assembly,
+                'description': description
+            })
         
         return test_cases
     
@@ -181,14 +250,8 @@ class RiscVTestGenerator:
         Returns:
             List of test cases for the specified format
         """
-        format_instructions = []
-        
         # Find all instructions of the specified format
-        for ext_name, ext_data in self.opcodes_db.items():
-            for instr_name, instr_info in ext_data.items():
-                if (not instr_name.startswith('$') and 
-                    instr_info.get('format') == format_type):
-                    format_instructions.append(instr_name)
+        format_instructions = self._by_format.get(format_type, ())
         
         if not format_instructions:
             logger.warning(f"No instructions found for format {format_type}")
@@ -224,21 +287,28 @@ class RiscVTestGenerator:
         output_path = Path(output_file)
         output_path.parent.mkdir(parents=True, exist_ok=True)
         
+        # The whole file is built first and written at once
+        parts = [
+            "# Generated RISC-V Test Cases",
+            "# This file contains randomly generated instruction test cases",
+            "",
+            ".section .text",
+            ".global _start",
+            "",
+            "_start:",
+        ]
+        parts.extend(f"    # Test case {i+1}: {test_case['description']}\n    {test_case['assembly']}"
+                     for i, test_case in enumerate(test_cases))
+        parts.extend([
+            "",
+            "    # Program termination",
+            "    li a7, 93     # sys_exit",
+            "    li a0, 0      # exit status",
+            "    ecall",
+        ])
+        
         with open(output_path, 'w') as f:
-            f.write("# Generated RISC-V Test Cases\n")
-            f.write("# This file contains randomly generated instruction test cases\n\n")
-            f.write(".section .text\n")
-            f.write(".global _start\n\n")
-            f.write("_start:\n")
-            
-            for i, test_case in enumerate(test_cases):
-                f.write(f"    # Test case {i+1}: {test_case['description']}\n")
-                f.write(f"    {test_case['assembly']}\n")
-            
-            f.write("\n    # Program termination\n")
-            f.write("    li a7, 93     # sys_exit\n")
-            f.write("    li a0, 0      # exit status\n")
-            f.write("    ecall\n")
+            f.write("\n".join(parts) + "\n")
         
         logger.info(f"Assembly file exported to {output_path}")
 
@@ -3,10 +3,72 @@ import re
 import json
 import shutil
 import subprocess
-import tempfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Patterns of the per-line hot path, compiled once
+_LABEL_RE = re.compile(r"^[A-Za-z_$.][\w$.]*:$")
+_STORE_OPERAND_RE = re.compile(r"^(?P<imm>-?\d+)\((?P<rs1>x\d+)\)$")
+
+# Format of the base instructions, keyed by name
+_FORMAT_BY_BASE = {
+    **dict.fromkeys((
+        'add','sub','sll','slt','sltu','xor','srl','sra','or','and',
+        'mul','mulh','mulhsu','mulhu','div','divu','rem','remu'
+    ), 'R-Type'),
+    **dict.fromkeys((
+        'addi','slti','sltiu','xori','ori','andi','slli','srli','srai',
+        'lb','lh','lw','lbu','lhu','jalr','ecall','ebreak'
+    ), 'I-Type'),
+    **dict.fromkeys(('sb','sh','sw'), 'S-Type'),
+    **dict.fromkeys(('beq','bne','blt','bge','bltu','bgeu'), 'B-Type'),
+    **dict.fromkeys(('lui','auipc'), 'U-Type'),
+    **dict.fromkeys(('jal',), 'J-Type'),
+}
+
+# Validator format of each format letter of the opcode database
+_FORMAT_BY_LETTER = {letter: f"{letter}-Type" for letter in "RISBUJ"}
+
+# Pseudo instructions accepted with a warning, left to the assembler
+_PSEUDO_INSTRUCTIONS = frozenset({"li", "mv", "nop", "la"})
+# Branch pseudo instructions comparing against zero
+_ZERO_BRANCHES = frozenset({"beqz", "bnez"})
+
+
+def _is_register(token: str) -> bool:
+    # x0..x31 without leading zeros, checked without a regex
+    digits = token[1:]
+    return (token[:1] == 'x' and 1 <= len(digits) <= 2 and digits.isascii() and digits.isdigit()
+            and (digits[0] != '0' or digits == '0') and int(digits) <= 31)
+
+
+def _parse_immediate(token: str) -> Optional[int]:
+    try:
+        if token.startswith('0x') or token.startswith('0X'):
+            return int(token, 16)
+        return int(token, 0)
+    except ValueError:
+        return None
+
+
+# Validator of a worker process of validate_files, built once by its initializer
+_worker_validator = None
+
+
+def _init_worker(enable_compile: bool, march: str) -> None:
+    global _worker_validator
+    _worker_validator = RiscVValidator(enable_compile=enable_compile, march=march)
+
+
+def _validate_file_in_worker(file_path: str) -> Dict:
+    return _worker_validator.validate_assembly_file(file_path)
+
 
 class RiscVValidator:
     """
@@ -65,7 +127,7 @@ class RiscVValidator:
 
         if mnemonic not in self.available_instructions:
             # Allow pseudo like "li", "mv" as warning (assembler will check)
-            if mnemonic in {"li", "mv", "nop", "la"}:
+            if mnemonic in _PSEUDO_INSTRUCTIONS:
                 warnings.append("Instrução pseudônima; validação parcial")
             else:
                 errors.append(f"Instrução desconhecida: {mnemonic}")
@@ -84,47 +146,75 @@ class RiscVValidator:
             "warnings": warnings
         }
 
+    def validate_assembly_lines(self, lines: List[str], start: int = 1) -> List[Dict]:
+        validate_line = self.validate_assembly_line
+        return [validate_line(line, idx) for idx, line in enumerate(lines, start=start)]
+
     def validate_assembly_file(self, file_path: str) -> Dict:
         resolved_path = self._resolve_assembly_path(file_path)
         if not resolved_path.exists():
             raise FileNotFoundError(f"Assembly file not found: {file_path}")
 
-        errors: List[Tuple[int, str]] = []
-        warnings: List[Tuple[int, str]] = []
+        # Messages are prefixed with their line number as they are collected
+        errors: List[str] = []
+        warnings: List[str] = []
+        add_error = errors.append
+        add_warning = warnings.append
         instruction_lines = 0
         valid_instructions = 0
+        total_lines = 0
+        # Whether a directive was seen, so that compiling does not need to read the lines again
+        has_directive = False
 
+        validate_line = self.validate_assembly_line
         with open(resolved_path, "r", encoding="utf-8") as f:
-            lines = f.readlines()
-
-        for idx, line in enumerate(lines, start=1):
-            result = self.validate_assembly_line(line, idx)
-            if result["type"] not in ("Empty", "Label"):
-                instruction_lines += 1
-            if result["valid"] and result["type"] not in ("Empty", "Label"):
-                valid_instructions += 1
-            for e in result["errors"]:
-                errors.append((idx, e))
-            for w in result["warnings"]:
-                warnings.append((idx, w))
+            for idx, line in enumerate(f, start=1):
+                total_lines = idx
+                if not has_directive and line.strip().startswith('.'):
+                    has_directive = True
+                result = validate_line(line, idx)
+                if result["type"] not in ("Empty", "Label"):
+                    instruction_lines += 1
+                if result["valid"] and result["type"] not in ("Empty", "Label"):
+                    valid_instructions += 1
+                for e in result["errors"]:
+                    add_error(f"L{idx}: {e}")
+                for w in result["warnings"]:
+                    add_warning(f"L{idx}: {w}")
 
         compiled_ok = None
         compile_output = None
         if self.enable_compile and errors == []:
-            compiled_ok, compile_output = self._compile_with_gas(resolved_path, lines)
+            compiled_ok, compile_output = self._compile_with_gas(resolved_path, not has_directive)
 
         return {
             "valid": len(errors) == 0 and (compiled_ok is not False),
-            "total_lines": len(lines),
+            "total_lines": total_lines,
             "instruction_lines": instruction_lines,
             "valid_instructions": valid_instructions,
-            "errors": [f"L{ln}: {msg}" for ln, msg in errors],
-            "warnings": [f"L{ln}: {msg}" for ln, msg in warnings],
+            "errors": errors,
+            "warnings": warnings,
             "compiled": compiled_ok,
             "compile_output": compile_output,
             "file": str(resolved_path)
         }
 
+    def validate_files(self, paths: List[str], workers: Optional[int] = None) -> List[Dict]:
+        """
+        Validate several assembly files, spread over worker processes.
+
+        Each worker loads the instruction database once and validates its share
+        of the files. The results are returned in the order of paths.
+        """
+        paths = list(paths)
+        workers = min(workers or os.cpu_count() or 1, len(paths))
+        if workers <= 1:
+            return [self.validate_assembly_file(path) for path in paths]
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.enable_compile, self.march)) as pool:
+            return list(pool.map(_validate_file_in_worker, paths))
+
     def print_validation_report(self, results: Dict, verbose: bool = False) -> None:
         print("Validation Report")
         print("=================")
@@ -151,7 +241,8 @@ class RiscVValidator:
         """
         Populate available_instructions from opcode JSONs. Prefer the checked-in
         path under src/database/data/opcodes/all_opcodes.json, fallback to src/data/opcodes.
-        Also set heuristic format map for common instructions.
+        The format map is taken from the 'format' of each opcode entry, with a
+        heuristic map filling in the common instructions left without one.
         """
         project_dir = Path(__file__).parent
         candidates = [
@@ -162,45 +253,30 @@ class RiscVValidator:
         for path in candidates:
             try:
                 if path.exists():
-                    with open(path, "r", encoding="utf-8") as f:
-                        data = json.load(f)
-                    # Collect instruction names across all extensions
+                    with open(path, "rb") as f:
+                        data = orjson.loads(f.read()) if orjson is not None else json.load(f)
+                    # Collect instruction names and formats across all extensions
                     for _ext, instrs in data.items():
-                        for name in instrs.keys():
-                            if not name.startswith("$"):
-                                self.available_instructions.add(name)
+                        for name, info in instrs.items():
+                            if name.startswith("$"):
+                                continue
+                            self.available_instructions.add(name)
+                            # Compressed instructions take fewer operands than their
+                            # 32-bit format, so they are left to the heuristics
+                            fmt = info.get("format") if isinstance(info, dict) else None
+                            if fmt in _FORMAT_BY_LETTER and not name.startswith("c."):
+                                self.instr_format_map.setdefault(name, _FORMAT_BY_LETTER[fmt])
                     break
             except Exception:
                 continue
 
         # Heuristic format map similar to fetcher logic
-        r_type = {
-            'add','sub','sll','slt','sltu','xor','srl','sra','or','and',
-            'mul','mulh','mulhsu','mulhu','div','divu','rem','remu'
-        }
-        i_type = {
-            'addi','slti','sltiu','xori','ori','andi','slli','srli','srai',
-            'lb','lh','lw','lbu','lhu','jalr','ecall','ebreak'
-        }
-        s_type = {'sb','sh','sw'}
-        b_type = {'beq','bne','blt','bge','bltu','bgeu'}
-        u_type = {'lui','auipc'}
-        j_type = {'jal'}
-
+        format_by_base = _FORMAT_BY_BASE
         for n in self.available_instructions:
             base = n.split('.')[0]  # strip compressed qualifiers if any
-            if base in r_type:
-                self.instr_format_map[n] = 'R-Type'
-            elif base in i_type:
-                self.instr_format_map[n] = 'I-Type'
-            elif base in s_type:
-                self.instr_format_map[n] = 'S-Type'
-            elif base in b_type:
-                self.instr_format_map[n] = 'B-Type'
-            elif base in u_type:
-                self.instr_format_map[n] = 'U-Type'
-            elif base in j_type:
-                self.instr_format_map[n] = 'J-Type'
+            fmt = format_by_base.get(base)
+            if fmt and n not in self.instr_format_map:
+                self.instr_format_map[n] = fmt
 
     def _strip_comments(self, line: str) -> str:
         # Support '#' style comments
@@ -214,33 +290,35 @@ class RiscVValidator:
         if not line:
             return None, []
         # Labels
-        if line.endswith(":") and re.match(r"^[A-Za-z_$.][\w$.]*:$", line):
+        if line.endswith(":") and _LABEL_RE.match(line):
             return line, []
         # Directives like .text, .globl
         if line.startswith('.'):
             return "Directive", [line]
         # Parse mnemonic and operands
-        parts = re.split(r"\s+", line, maxsplit=1)
+        parts = line.split(None, 1)
         mnemonic = parts[0]
-        operands_str = parts[1] if len(parts) > 1 else ""
+        if len(parts) == 1:
+            return mnemonic, []
         # split by commas respecting simple immediates
-        operands = [op.strip() for op in operands_str.split(',') if op.strip()]
+        operands = [op for op in map(str.strip, parts[1].split(',')) if op]
         return mnemonic, operands
 
     def _determine_format(self, mnemonic: str) -> str:
-        if mnemonic in ("Directive",):
+        if mnemonic == "Directive":
             return "Directive"
-        if mnemonic in self.instr_format_map:
-            return self.instr_format_map[mnemonic]
+        fmt = self.instr_format_map.get(mnemonic)
+        if fmt:
+            return fmt
         base = mnemonic.split('.')[0]
         # Heuristics consistent with fetcher
-        if base.endswith('i') and base not in {'lui'}:
+        if base.endswith('i') and base != 'lui':
             return 'I-Type'
         if base.startswith('l') and len(base) <= 4:
             return 'I-Type'
         if base.startswith('s') and len(base) <= 4:
             return 'S-Type'
-        if base.startswith('b') and base not in {'beqz','bnez'}:
+        if base.startswith('b') and base not in _ZERO_BRANCHES:
             return 'B-Type'
         return 'Unknown'
 
@@ -264,20 +342,11 @@ class RiscVValidator:
                 warnings.append(f"Número de operandos esperado para {inst_type}: {expected[inst_type]}")
 
         # Validate register and immediate constraints
-        def is_reg(token: str) -> bool:
-            return re.fullmatch(r"x([0-9]|[12][0-9]|3[01])", token) is not None
-
-        def parse_imm(token: str) -> Optional[int]:
-            try:
-                if token.startswith('0x') or token.startswith('0X'):
-                    return int(token, 16)
-                return int(token, 0)
-            except ValueError:
-                return None
+        parse_imm = _parse_immediate
 
         # Helper to check ranges
         def check_reg(tok: str, role: str) -> None:
-            if not is_reg(tok):
+            if not _is_register(tok):
                 errors.append(f"Operando {role} inválido: '{tok}' (esperado x0..x31)")
             else:
                 if role == 'rd' and tok == 'x0':
@@ -301,15 +370,14 @@ class RiscVValidator:
 
         elif inst_type == 'S-Type' and len(operands) >= 3:
             # Store syntax can be 'sw rs2, imm(rs1)' or 'sw rs2, rs1, imm'. Try both.
-            if re.match(r"^-?\d+\(x\d+\)$", operands[1]):
+            m = _STORE_OPERAND_RE.match(operands[1])
+            if m:
                 # rs2, imm(rs1)
                 check_reg(operands[0], 'rs2')
-                m = re.match(r"^(?P<imm>-?\d+)\((?P<rs1>x\d+)\)$", operands[1])
-                if m:
-                    check_reg(m.group('rs1'), 'rs1')
-                    imm_val = parse_imm(m.group('imm'))
-                    if imm_val is None:
-                        errors.append(f"Imediato inválido: '{operands[1]}'")
+                check_reg(m.group('rs1'), 'rs1')
+                imm_val = parse_imm(m.group('imm'))
+                if imm_val is None:
+                    errors.append(f"Imediato inválido: '{operands[1]}'")
                 # third operand ignored in this form if present
             else:
                 check_reg(operands[0], 'rs2')
@@ -356,40 +424,25 @@ class RiscVValidator:
             return candidate
         return p
 
-    def _compile_with_gas(self, asm_path: Path, lines: List[str]) -> Tuple[Optional[bool], Optional[str]]:
+    def _compile_with_gas(self, asm_path: Path, needs_wrap: bool) -> Tuple[Optional[bool], Optional[str]]:
         # Check if assembler is available
         assembler = shutil.which("riscv32-unknown-elf-as")
         if assembler is None:
             return None, "Assembler 'riscv32-unknown-elf-as' não encontrado no PATH"
 
-        temp_dir = Path(tempfile.mkdtemp(prefix="riscv_validate_"))
-        try:
-            temp_asm = temp_dir / "temp.s"
-            content = "".join(lines)
-            # If file lacks a section directive, wrap minimally
-            needs_wrap = not any(l.strip().startswith('.') for l in lines)
-            if needs_wrap:
-                wrapped = [
-                    ".section .text\n",
-                    ".globl _start\n",
-                    "_start:\n",
-                ]
-                wrapped.append(content)
-                content = "".join(wrapped)
-            with open(temp_asm, "w", encoding="utf-8") as f:
-                f.write(content)
-
-            temp_obj = temp_dir / "temp.o"
-            cmd = [assembler, f"-march={self.march}", "-o", str(temp_obj), str(temp_asm)]
-            proc = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            ok = proc.returncode == 0
-            output = (proc.stdout or "") + (proc.stderr or "")
-            return ok, output
-        finally:
-            try:
-                shutil.rmtree(temp_dir)
-            except Exception:
-                pass
+        with open(asm_path, "r", encoding="utf-8") as f:
+            content = f.read()
+        # If file lacks a section directive, wrap minimally
+        if needs_wrap:
+            content = ".section .text\n.globl _start\n_start:\n" + content
+
+        # The assembly is piped to the assembler and the object file is discarded
+        cmd = [assembler, f"-march={self.march}", "-o", os.devnull, "-"]
+        proc = subprocess.run(cmd, input=content, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              text=True, encoding="utf-8")
+        ok = proc.returncode == 0
+        output = (proc.stdout or "") + (proc.stderr or "")
+        return ok, output
 
 
 __all__ = ["RiscVValidator"]
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Regression tests for the decoding of 16-bit compressed (RVC) instructions."""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from classifier.profile_classifier import ProfileClassifier
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def _words_to_binary(words):
+    return b''.join(word.to_bytes(4, 'little') for word in words)
+
+def test_zero_halfword_is_illegal():
+    classifier = ProfileClassifier()
+    instruction = classifier.parser.parse_compressed(0x0000)
+    assert instruction["error"] == "Illegal instruction"
+    assert instruction["extension"] == "Unknown"
+
+def test_reserved_encodings_are_not_decoded():
+    classifier = ProfileClassifier()
+    # c.addi4spn with nzuimm=0, c.lui with nzimm=0, c.lwsp with rd=0, c.jr with rs1=0
+    for halfword in (0x0004, 0x6081, 0x4002, 0x8002):
+        instruction = classifier.parser.parse_compressed(halfword)
+        assert "error" in instruction, f"{halfword:04x} decoded as {instruction.get('instruction')}"
+
+    # c.addi4spn x8, sp, 4 is a real instruction
+    assert classifier.parser.parse_compressed(0x0040)["instruction"] == "c.addi4spn"
+
+def test_zero_padding_keeps_the_32_bit_walk():
+    with open(os.path.join(TESTS_DIR, "memory.hex")) as f:
+        words = [int(line, 16) for line in f if line.strip()]
+
+    results = ProfileClassifier().classify_binary(_words_to_binary(words))
+    assert len(results["instructions"]) == len(words)
+    assert results["extensions_used"] == ['I']
+
+def test_zero_low_halfword_words_stay_32_bit():
+    # addi x1, x0, 5 followed by a word whose low halfword is zero
+    results = ProfileClassifier().classify_binary(_words_to_binary([0x00500093, 0x12340000]))
+
+    instructions = list(results["instructions"])
+    assert len(instructions) == 2
+    assert instructions[1]["error"] == "Unknown instruction"
+    assert instructions[1]["hex"] == "12340000"
+    assert len(instructions[1]["binary"]) == 32
+    assert instructions[1]["offset"] == 4
+    assert results["extensions_used"] == ['I']
+
+def test_illegal_halfwords_are_not_tracked():
+    # c.addi x10, x10, 1 followed by a zero halfword, then addi x1, x0, 5
+    binary = bytes.fromhex("0505") + bytes(2) + _words_to_binary([0x00500093])
+    results = ProfileClassifier().classify_binary(binary)
+
+    instructions = list(results["instructions"])
+    assert [instruction.get("instruction") for instruction in instructions] == ["c.addi", None, "addi"]
+    assert instructions[1]["error"] == "Illegal instruction"
+    assert sorted(results["extensions_used"]) == ['C', 'I']
+
+def main():
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✓ {name}")
+
+if __name__ == "__main__":
+    main()
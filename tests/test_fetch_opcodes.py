@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""Regression tests for the parsing of riscv-opcodes extension files."""
+
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from fetch_opcodes import RiscVOpcodesFetcher
+
+OPCODE_FILE = """# Integer instructions
+add     rd rs1 rs2 31..25=0  14..12=0 6..2=0x0C 1..0=3
+addi    rd rs1 imm12 14..12=0 6..2=0x04 1..0=3
+fence.tso 31..28=8 27..24=3 23..20=3 19..15=ignore 14..12=0 11..7=ignore 6..2=0x03 1..0=3
+typo    rd rs1 imm12 14..12=0x0g 6..2=0x04 1..0=3
+range   rd rs1 imm12 14..12..0=0 6..2=0x04 1..0=3
+c.lw    rd_p rs1_p c_uimm7lo c_uimm7hi 1..0=0 15..13=2
+"""
+
+def _parse(content):
+    with tempfile.TemporaryDirectory() as output_dir:
+        fetcher = RiscVOpcodesFetcher(output_dir=output_dir, use_cache=False)
+        return fetcher._parse_opcode_file(content)
+
+def test_well_formed_lines():
+    opcodes = _parse(OPCODE_FILE)
+    assert opcodes["add"]["opcode"] == 0x33
+    assert opcodes["add"]["funct3"] == 0
+    assert opcodes["add"]["funct7"] == 0
+    assert opcodes["addi"]["opcode"] == 0x13
+    assert opcodes["c.lw"]["fields"] == {"1..0": 0, "15..13": 2}
+
+def test_lines_with_malformed_fields_are_skipped():
+    opcodes = _parse(OPCODE_FILE)
+    for name in ("fence.tso", "typo", "range"):
+        assert name not in opcodes, f"{name} parsed as {opcodes.get(name)}"
+    assert sorted(opcodes) == ["add", "addi", "c.lw"]
+
+def main():
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✓ {name}")
+
+if __name__ == "__main__":
+    main()
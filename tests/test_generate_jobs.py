@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""Regression tests for the --jobs worker processes of the generator tool."""
+
+import logging
+import os
+import random
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from generate_riscv_code import RiscVCodeGenerator, PARALLEL_MIN_CASES
+
+logging.getLogger().setLevel(logging.WARNING)
+
+def test_generation_is_the_same_for_any_jobs_above_one():
+    generator = RiscVCodeGenerator()
+    count = PARALLEL_MIN_CASES // 2
+    outputs = []
+    for jobs in (2, 3):
+        random.seed(7)
+        outputs.append(generator.generate_code_for_instructions(["add", "addi"], count, jobs))
+    assert outputs[0] == outputs[1]
+
+def main():
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✓ {name}")
+
+if __name__ == "__main__":
+    main()
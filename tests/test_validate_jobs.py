@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Regression tests for the --jobs worker processes of the validator tool."""
+
+import logging
+import os
+import random
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from generate_riscv_code import RiscVCodeGenerator
+from validate_riscv_code import RiscVValidator, PARALLEL_CHUNK_SIZE
+
+logging.getLogger().setLevel(logging.WARNING)
+
+def _assembly_lines(count):
+    """Generated code with a few invalid lines, spread over several validation chunks"""
+    random.seed(1)
+    lines = RiscVCodeGenerator().generate_code_for_instructions(["add", "addi", "sw", "beq"], count // 8)
+    lines[5] = "add x40, x1, x2"
+    lines.insert(PARALLEL_CHUNK_SIZE, "invalid_instr x1")
+    return lines
+
+def test_validation_jobs_match_serial():
+    lines = _assembly_lines(3 * PARALLEL_CHUNK_SIZE)
+    assert len(lines) > 2 * PARALLEL_CHUNK_SIZE
+
+    serial = RiscVValidator().validate_assembly_lines(lines, "test")
+    parallel = RiscVValidator().validate_assembly_lines(lines, "test", jobs=2)
+    assert parallel == serial
+    assert not serial["valid"]
+    assert "Line 6: Register rd (x40) out of range [0-31]" in serial["errors"]
+    assert f"Line {PARALLEL_CHUNK_SIZE + 1}: Unknown instruction 'invalid_instr'" in serial["errors"]
+
+def main():
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✓ {name}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""Regression tests for the --json-output encoding of the validator tool."""
+
+import json
+import logging
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+from validate_riscv_code import RiscVValidator, _encode_json
+
+logging.getLogger().setLevel(logging.WARNING)
+
+def test_results_encode_like_json_dump():
+    results = RiscVValidator().validate_assembly_lines(["add x1, x2, x3", "addi x1, x2, 5000"], "test")
+    assert _encode_json(results) == json.dumps(results, indent=2).encode()
+
+def test_immediates_wider_than_64_bits():
+    results = RiscVValidator().validate_assembly_lines(["addi x1, x2, 99999999999999999999"], "test")
+    assert json.loads(_encode_json(results)) == results
+
+def main():
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"✓ {name}")
+
+if __name__ == "__main__":
+    main()
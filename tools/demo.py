@@ -6,45 +6,43 @@ This script demonstrates the complete workflow of generating random RISC-V
 assembly code and validating it for correctness.
 """
 
-import subprocess
 import tempfile
 import os
+import logging
 from pathlib import Path
 
-def run_command(cmd):
-    """Run a command and return the result."""
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-    return result.returncode, result.stdout, result.stderr
+# The tools are used in-process, so that the opcodes database is loaded once for all the demos
+from generate_riscv_code import RiscVCodeGenerator
+from validate_riscv_code import RiscVValidator
 
-def demo_basic_generation():
+def demo_basic_generation(generator):
     """Demo basic code generation."""
     print("🔧 DEMO 1: Basic Code Generation")
     print("=" * 50)
     
-    cmd = "python3 generate_riscv_code.py add sub sll addi lui --count 2"
-    ret_code, stdout, stderr = run_command(cmd)
+    instructions = ["add", "sub", "sll", "addi", "lui"]
+    code = "\n".join(generator.generate_code_for_instructions(instructions, 2))
     
-    print("Command:", cmd)
+    print("Instructions:", " ".join(instructions), "(2 each)")
     print("Generated code:")
-    print(stdout)
+    print(code)
     
-    return stdout
+    return code
 
-def demo_format_generation():
+def demo_format_generation(generator):
     """Demo format-specific generation."""
     print("\n🔧 DEMO 2: Format-Specific Generation")
     print("=" * 50)
     
-    cmd = "python3 generate_riscv_code.py --format I --count 5"
-    ret_code, stdout, stderr = run_command(cmd)
+    code = "\n".join(generator.generate_format_code('I', 5))
     
-    print("Command:", cmd)
+    print("Format: I (5 instructions)")
     print("Generated I-Type instructions:")
-    print(stdout)
+    print(code)
     
-    return stdout
+    return code
 
-def demo_validation(assembly_code):
+def demo_validation(validator, assembly_code):
     """Demo validation of generated code."""
     print("\n🔧 DEMO 3: Code Validation")
     print("=" * 50)
@@ -56,14 +54,13 @@ def demo_validation(assembly_code):
     
     try:
         # Validate the code
-        cmd = f"python3 validate_riscv_code.py {temp_file} --verbose"
-        ret_code, stdout, stderr = run_command(cmd)
+        results = validator.validate_assembly_file(temp_file)
         
-        print("Command:", cmd)
+        print("Validated file:", temp_file)
         print("Validation result:")
-        print(stdout)
+        validator.print_validation_report(results, verbose=True)
         
-        if ret_code == 0:
+        if results['valid']:
             print("✅ Code validation: PASSED")
         else:
             print("❌ Code validation: FAILED")
@@ -72,7 +69,7 @@ def demo_validation(assembly_code):
         # Clean up temporary file
         os.unlink(temp_file)
 
-def demo_invalid_code():
+def demo_invalid_code(validator):
     """Demo validation with invalid code."""
     print("\n🔧 DEMO 4: Invalid Code Detection")
     print("=" * 50)
@@ -90,15 +87,14 @@ invalid_instr x1    # Invalid instruction name
         temp_file = f.name
     
     try:
-        cmd = f"python3 validate_riscv_code.py {temp_file} --verbose"
-        ret_code, stdout, stderr = run_command(cmd)
+        results = validator.validate_assembly_file(temp_file)
         
         print("Invalid test code:")
         print(invalid_code)
         print("Validation result:")
-        print(stdout)
+        validator.print_validation_report(results, verbose=True)
         
-        if ret_code != 0:
+        if not results['valid']:
             print("✅ Error detection: WORKING (correctly detected invalid code)")
         else:
             print("❌ Error detection: NOT WORKING (should have failed)")
@@ -106,18 +102,21 @@ invalid_instr x1    # Invalid instruction name
     finally:
         os.unlink(temp_file)
 
-def demo_instruction_listing():
+def demo_instruction_listing(generator):
     """Demo instruction listing capabilities."""
     print("\n🔧 DEMO 5: Available Instructions")
     print("=" * 50)
     
-    cmd = "python3 generate_riscv_code.py --list-by-format"
-    ret_code, stdout, stderr = run_command(cmd)
+    lines = ["Instructions by format:"]
+    for format_type, instrs in sorted(generator.list_instructions_by_format().items()):
+        lines.append("")
+        lines.append(f"{format_type}-Type ({len(instrs)} instructions):")
+        lines.extend(f"  {instr}" for instr in instrs[:10])
+        if len(instrs) > 10:
+            lines.append(f"  ... and {len(instrs) - 10} more")
     
-    print("Command:", cmd)
     print("Available instruction formats:")
     # Show only first few lines to keep output manageable
-    lines = stdout.split('\n')
     for line in lines[:20]:
         print(line)
     print("... (truncated for demo)")
@@ -136,12 +135,17 @@ def main():
     script_dir = Path(__file__).parent
     os.chdir(script_dir)
     
+    # Keep the tools' progress messages out of the demo output
+    logging.getLogger().setLevel(logging.WARNING)
+    generator = RiscVCodeGenerator()
+    validator = RiscVValidator()
+    
     # Run demonstrations
-    assembly_code = demo_basic_generation()
-    format_code = demo_format_generation()
-    demo_validation(assembly_code)
-    demo_invalid_code()
-    demo_instruction_listing()
+    assembly_code = demo_basic_generation(generator)
+    format_code = demo_format_generation(generator)
+    demo_validation(validator, assembly_code)
+    demo_invalid_code(validator)
+    demo_instruction_listing(generator)
     
     print("\n🎉 Demo Complete!")
     print("=" * 60)
@@ -16,12 +16,14 @@ Examples:
 """
 
 import argparse
+import json
 import sys
 import random
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterable, Iterator, Optional
 import logging
-import datetime
+import time
+from itertools import islice
 
 # Add the src directory to the path to import riscv_tools
 sys.path.append(str(Path(__file__).parent.parent / "src"))
@@ -31,57 +33,183 @@ from test_generator import RiscVTestGenerator
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+# Size of the write buffer of output files, as the lines are written one at a time
+OUTPUT_BUFFER_SIZE = 1 << 20
+
+# Number of test cases a worker generates at a time with --jobs
+PARALLEL_CHUNK_SIZE = 5000
+# Below this many test cases in total, the code is generated in-process even with --jobs
+PARALLEL_MIN_CASES = 20000
+
+# Code generator of a worker process, built once by its initializer
+_worker_generator = None
+
+def _init_worker():
+    global _worker_generator
+    logging.getLogger().setLevel(logging.WARNING)
+    _worker_generator = RiscVCodeGenerator()
+
+def _generate_chunk(unit) -> List[str]:
+    instruction, count, seed = unit
+    # Each chunk has its own seed, so that the workers do not repeat the same values
+    random.seed(seed)
+    test_cases = _worker_generator.test_generator.generate_random_test_case(instruction, count)
+    return list(_worker_generator._test_case_lines(instruction, test_cases))
+
+def serve(generator, requests: Iterable[str], out) -> None:
+    """
+    Answer generation requests, one JSON object per line, for the --server mode.
+    
+    A request is {"instructions": [...], "count": N} or {"format": "R", "count": N}.
+    Each is answered with one line holding the JSON list of the generated assembly
+    lines, or {"error": "..."} if the request could not be handled.
+    """
+    for request in requests:
+        if not request.strip():
+            continue
+        try:
+            req = json.loads(request)
+            count = req.get("count", 1)
+            if req.get("format"):
+                response = generator.generate_format_code(req["format"], count)
+            else:
+                response = generator.generate_code_for_instructions(req["instructions"], count)
+        except KeyError as e:
+            response = {"error": f"Missing field in request: {e}"}
+        except Exception as e:
+            response = {"error": str(e)}
+        out.write(json.dumps(response) + "\n")
+        out.flush()
+
+def write_lines(f, lines: Iterable[str]) -> None:
+    """Write lines separated by newlines, as '\\n'.join would, without joining them first."""
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is not None:
+        f.write(first)
+        f.writelines("\n" + line for line in lines)
+
 class RiscVCodeGenerator:
     """Generates valid RISC-V assembly code from instruction names."""
     
     def __init__(self):
         self.test_generator = RiscVTestGenerator()
         
-    def generate_code_for_instructions(self, instructions: List[str], count_per_instruction: int = 1) -> List[str]:
+        # Sorted instructions of each format, built from the test generator's index on first use
+        self._sorted_by_format = None
+        
+    def generate_code_for_instructions(self, instructions: List[str], count_per_instruction: int = 1,
+                                       jobs: int = 1) -> List[str]:
         """
         Generate RISC-V assembly code for specified instructions.
         
         Args:
             instructions: List of instruction names
             count_per_instruction: Number of instances to generate per instruction
+            jobs: Number of worker processes for large amounts of test cases. The
+                  workers draw other random values than in-process generation, so
+                  the output of a seeded run depends on whether jobs is above 1
             
         Returns:
             List of assembly code lines
         """
-        assembly_lines = []
+        return list(self.iter_code_for_instructions(instructions, count_per_instruction, jobs))
+    
+    def iter_code_for_instructions(self, instructions: List[str], count_per_instruction: int = 1,
+                                   jobs: int = 1) -> Iterator[str]:
+        """
+        Generate RISC-V assembly code for specified instructions, one line at a time.
+        
+        Args:
+            instructions: List of instruction names
+            count_per_instruction: Number of instances to generate per instruction
+            jobs: Number of worker processes for large amounts of test cases, see
+                  generate_code_for_instructions
+            
+        Yields:
+            Assembly code lines
+        """
+        # Large amounts of test cases are generated up front by the workers
+        worker_lines = None
+        if jobs > 1 and count_per_instruction * len(instructions) >= PARALLEL_MIN_CASES:
+            worker_lines = self._generate_in_workers(instructions, count_per_instruction, jobs)
         
         # Add header comment
-        assembly_lines.append("# Generated RISC-V Assembly Code")
-        assembly_lines.append("# Instructions: " + ", ".join(instructions))
-        assembly_lines.append("")
+        yield "# Generated RISC-V Assembly Code"
+        yield "# Instructions: " + ", ".join(instructions)
+        yield ""
         
-        for instruction in instructions:
+        for index, instruction in enumerate(instructions):
             # Check if instruction exists
-            instr_info = self.test_generator.get_instruction_info(instruction)
-            if not instr_info:
+            # Only checks that the instruction exists, so the index entry is not copied
+            if not self.test_generator._get_instruction_entry(instruction):
                 logger.warning(f"Instruction '{instruction}' not found, skipping...")
-                assembly_lines.append(f"# WARNING: Instruction '{instruction}' not found")
+                yield f"# WARNING: Instruction '{instruction}' not found"
                 continue
                 
             # Generate test cases for this instruction
-            test_cases = self.test_generator.generate_random_test_case(instruction, count_per_instruction)
+            if worker_lines is not None:
+                lines = worker_lines.get(index)
+            else:
+                test_cases = self.test_generator.generate_random_test_case(instruction, count_per_instruction)
+                lines = self._test_case_lines(instruction, test_cases) if test_cases else None
             
-            if test_cases:
-                assembly_lines.append(f"# {instruction} instructions")
-                for i, test_case in enumerate(test_cases, 1):
-                    assembly_line = test_case.get('assembly', instruction)
-                    assembly_lines.append(f"{assembly_line}")
-                    
-                    # Add a comment with parameter details
-                    params = test_case.get('parameters', {})
-                    if params:
-                        param_str = ", ".join([f"{k}={v}" for k, v in params.items()])
-                        assembly_lines.append(f"    # Parameters: {param_str}")
-                assembly_lines.append("")
+            if lines:
+                yield f"# {instruction} instructions"
+                yield from lines
+                yield ""
             else:
                 logger.warning(f"No test cases generated for {instruction}")
-                
-        return assembly_lines
+    
+    def _test_case_lines(self, instruction: str, test_cases: List[Dict]) -> Iterator[str]:
+        """Get the assembly lines of test cases, each followed by a comment with its parameters."""
+        # All test cases of an instruction have the same parameters, so the
+        # parameter comment is laid out once and filled in with each case's values
+        param_format = "    # Parameters: " + ", ".join(
+            f"{name}={{}}" for name in test_cases[0].get('parameters', {}))
+        for test_case in test_cases:
+            yield test_case.get('assembly', instruction)
+            
+            # Add a comment with parameter details
+            params = test_case.get('parameters', {})
+            if params:
+                yield param_format.format(*params.values())
+    
+    def _generate_in_workers(self, instructions: List[str], count_per_instruction: int,
+                             jobs: int) -> Dict[int, List[str]]:
+        """
+        Generate the test case lines of the instructions in worker processes.
+        
+        Args:
+            instructions: List of instruction names
+            count_per_instruction: Number of instances to generate per instruction
+            jobs: Number of worker processes
+            
+        Returns:
+            Test case lines of each known instruction, keyed by its position in instructions
+        """
+        # The test cases are split into chunks, each with a seed drawn here, so that
+        # a seeded run gives the same output for any number of workers. It is not
+        # the output of in-process generation, which draws the values in another order.
+        positions = []
+        units = []
+        for index, instruction in enumerate(instructions):
+            if not self.test_generator._get_instruction_entry(instruction):
+                continue
+            for start in range(0, count_per_instruction, PARALLEL_CHUNK_SIZE):
+                positions.append(index)
+                units.append((instruction, min(PARALLEL_CHUNK_SIZE, count_per_instruction - start),
+                              random.getrandbits(64)))
+        
+        # Imported here, as it adds to the start-up time of every other use of the tool
+        from concurrent.futures import ProcessPoolExecutor
+        
+        logger.info(f"Generating {len(units)} chunks of test cases with {jobs} workers")
+        lines_by_position = {}
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+            for index, lines in zip(positions, pool.map(_generate_chunk, units)):
+                lines_by_position.setdefault(index, []).extend(lines)
+        return lines_by_position
     
     def generate_format_code(self, format_type: str, count: int = 10) -> List[str]:
         """
@@ -94,32 +222,40 @@ class RiscVCodeGenerator:
         Returns:
             List of assembly code lines
         """
-        assembly_lines = []
+        return list(self.iter_format_code(format_type, count))
+    
+    def iter_format_code(self, format_type: str, count: int = 10) -> Iterator[str]:
+        """
+        Generate code for all instructions of a specific format, one line at a time.
         
-        # Get all instructions of the specified format
-        format_instructions = []
-        for ext_name, ext_data in self.test_generator.opcodes_db.items():
-            for instr_name, instr_info in ext_data.items():
-                if (not instr_name.startswith('$') and 
-                    instr_info.get('format') == format_type):
-                    format_instructions.append(instr_name)
+        Args:
+            format_type: Instruction format ('R', 'I', 'S', 'B', 'U', 'J')
+            count: Total number of instructions to generate
+            
+        Yields:
+            Assembly code lines
+        """
+        # Get all instructions of the specified format, from the test generator's index
+        format_instructions = self.test_generator.get_instructions_by_format().get(format_type, ())
         
         if not format_instructions:
             logger.error(f"No instructions found for format {format_type}")
-            return ["# No instructions found for format " + format_type]
+            yield "# No instructions found for format " + format_type
+            return
         
-        # Randomly select instructions to generate
-        selected_instructions = random.sample(
-            format_instructions, 
-            min(count, len(format_instructions))
-        )
+        # Randomly select instructions to generate, repeating them when more are
+        # asked for than the format has
+        if count <= len(format_instructions):
+            selected_instructions = random.sample(format_instructions, count)
+        else:
+            selected_instructions = random.choices(format_instructions, k=count)
         
         logger.info(f"Generating code for {len(selected_instructions)} {format_type}-type instructions")
         
         # Add header
-        assembly_lines.append(f"# Generated {format_type}-Type RISC-V Instructions")
-        assembly_lines.append(f"# Selected instructions: {', '.join(selected_instructions)}")
-        assembly_lines.append("")
+        yield f"# Generated {format_type}-Type RISC-V Instructions"
+        yield f"# Selected instructions: {', '.join(selected_instructions)}"
+        yield ""
         
         # Generate code for each selected instruction
         for instruction in selected_instructions:
@@ -127,15 +263,13 @@ class RiscVCodeGenerator:
             if test_cases:
                 test_case = test_cases[0]
                 assembly_line = test_case.get('assembly', instruction)
-                assembly_lines.append(f"{assembly_line}")
+                yield f"{assembly_line}"
                 
                 # Add comment with details
                 params = test_case.get('parameters', {})
                 if params:
                     param_str = ", ".join([f"{k}={v}" for k, v in params.items()])
-                    assembly_lines.append(f"    # {instruction} - {param_str}")
-        
-        return assembly_lines
+                    yield f"    # {instruction} - {param_str}"
     
     def list_available_instructions(self) -> List[str]:
         """Get list of all available instructions."""
@@ -143,21 +277,12 @@ class RiscVCodeGenerator:
     
     def list_instructions_by_format(self) -> Dict[str, List[str]]:
         """Get instructions organized by format."""
-        by_format = {}
-        
-        for ext_name, ext_data in self.test_generator.opcodes_db.items():
-            for instr_name, instr_info in ext_data.items():
-                if not instr_name.startswith('$'):  # Skip pseudo-ops
-                    format_type = instr_info.get('format', 'Unknown')
-                    if format_type not in by_format:
-                        by_format[format_type] = []
-                    by_format[format_type].append(instr_name)
-        
-        # Sort lists
-        for format_type in by_format:
-            by_format[format_type] = sorted(set(by_format[format_type]))
-            
-        return by_format
+        if self._sorted_by_format is None:
+            self._sorted_by_format = {
+                format_type: sorted(set(instrs))
+                for format_type, instrs in self.test_generator.get_instructions_by_format().items()
+            }
+        return {format_type: list(instrs) for format_type, instrs in self._sorted_by_format.items()}
     
     def generate_output_filename(self, instructions: List[str] = None, format_type: str = None, count: int = 1) -> str:
         """
@@ -171,7 +296,7 @@ class RiscVCodeGenerator:
         Returns:
             Generated filename with timestamp
         """
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        timestamp = time.strftime("%Y%m%d_%H%M%S")
         
         if format_type:
             # Format-specific generation
@@ -221,6 +346,15 @@ Examples:
         help='Number of instances per instruction (default: 1)'
     )
     
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=1,
+        help='Number of worker processes for large --count values (default: 1). '
+             'Above 1, large runs draw different random values than a single process, '
+             'the same for any number of jobs'
+    )
+    
     # Format-specific generation
     parser.add_argument(
         '--all-r-type',
@@ -265,6 +399,12 @@ Examples:
         help='List instructions organized by format and exit'
     )
     
+    parser.add_argument(
+        '--server',
+        action='store_true',
+        help='Read JSON generation requests from stdin, one per line, and answer each on stdout'
+    )
+    
     # Verbose output
     parser.add_argument(
         '--verbose', '-v',
@@ -285,48 +425,51 @@ Examples:
         logger.error(f"Failed to initialize code generator: {e}")
         sys.exit(1)
     
+    # Serve requests with the loaded generator until stdin is closed
+    if args.server:
+        serve(generator, sys.stdin, sys.stdout)
+        sys.exit(0)
+    
     # Handle information requests
     if args.list_instructions:
         instructions = generator.list_available_instructions()
-        print(f"Available instructions ({len(instructions)}):")
-        for i, instr in enumerate(instructions, 1):
-            print(f"  {i:3d}. {instr}")
+        lines = [f"Available instructions ({len(instructions)}):"]
+        lines.extend(f"  {i:3d}. {instr}" for i, instr in enumerate(instructions, 1))
+        write_lines(sys.stdout, lines)
+        sys.stdout.write("\n")
         sys.exit(0)
     
     if args.list_by_format:
         by_format = generator.list_instructions_by_format()
-        print("Instructions by format:")
+        lines = ["Instructions by format:"]
         for format_type, instrs in sorted(by_format.items()):
-            print(f"\n{format_type}-Type ({len(instrs)} instructions):")
-            for instr in instrs[:10]:  # Show first 10
-                print(f"  {instr}")
+            lines.append(f"\n{format_type}-Type ({len(instrs)} instructions):")
+            lines.extend(f"  {instr}" for instr in islice(instrs, 10))  # Show first 10
             if len(instrs) > 10:
-                print(f"  ... and {len(instrs) - 10} more")
+                lines.append(f"  ... and {len(instrs) - 10} more")
+        write_lines(sys.stdout, lines)
+        sys.stdout.write("\n")
         sys.exit(0)
     
-    # Generate assembly code
-    assembly_lines = []
-    
+    # Generate assembly code, one line at a time as it is written out
     if args.all_r_type or args.format == 'R':
-        assembly_lines = generator.generate_format_code('R', args.count)
+        assembly_lines = generator.iter_format_code('R', args.count)
     elif args.all_i_type or args.format == 'I':
-        assembly_lines = generator.generate_format_code('I', args.count)
+        assembly_lines = generator.iter_format_code('I', args.count)
     elif args.format:
-        assembly_lines = generator.generate_format_code(args.format, args.count)
+        assembly_lines = generator.iter_format_code(args.format, args.count)
     elif args.instructions:
-        assembly_lines = generator.generate_code_for_instructions(args.instructions, args.count)
+        assembly_lines = generator.iter_code_for_instructions(args.instructions, args.count, args.jobs)
     else:
         parser.print_help()
         print("\nError: No instructions or format specified")
         sys.exit(1)
     
     # Output results
-    output_text = '\n'.join(assembly_lines)
-    
     if args.output:
         try:
-            with open(args.output, 'w') as f:
-                f.write(output_text)
+            with open(args.output, 'w', buffering=OUTPUT_BUFFER_SIZE) as f:
+                write_lines(f, assembly_lines)
             logger.info(f"Assembly code written to {args.output}")
         except Exception as e:
             logger.error(f"Failed to write to {args.output}: {e}")
@@ -346,14 +489,15 @@ Examples:
             
             output_path = output_dir / filename
             
-            with open(output_path, 'w') as f:
-                f.write(output_text)
+            with open(output_path, 'w', buffering=OUTPUT_BUFFER_SIZE) as f:
+                write_lines(f, assembly_lines)
             logger.info(f"Assembly code written to {output_path}")
         except Exception as e:
             logger.error(f"Failed to write to output folder: {e}")
             sys.exit(1)
     else:
-        print(output_text)
+        write_lines(sys.stdout, assembly_lines)
+        sys.stdout.write("\n")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
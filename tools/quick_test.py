@@ -3,18 +3,53 @@
 Quick test script to demonstrate the reorganized RISC-V tools workflow.
 """
 
+import shutil
 import subprocess
 import sys
+import logging
 from pathlib import Path
 
+# The tools are used in-process, so that the opcodes database is loaded once for all the tests
+from generate_riscv_code import RiscVCodeGenerator
+from validate_riscv_code import RiscVValidator
+
+def run_step(step, description):
+    """Run a step of the workflow in-process and display the result."""
+    print(f"\n🔧 {description}")
+    print("=" * 50)
+    print()
+    
+    try:
+        ok = step()
+    except Exception as e:
+        ok = False
+        print(f"Error: {e}")
+    
+    if ok:
+        print(f"✅ {description} - SUCCESS")
+    else:
+        print(f"❌ {description} - FAILED")
+    return ok
+
+def save_to_output(assembly_lines, filename):
+    """Save generated code to the output/ folder, as --save-to-output does."""
+    output_dir = Path("output")
+    output_dir.mkdir(exist_ok=True)
+    output_path = output_dir / filename
+    with open(output_path, 'w') as f:
+        f.write('\n'.join(assembly_lines))
+    print(f"Assembly code written to {output_path}")
+    return True
+
 def run_command(cmd, description):
     """Run a command and display the result."""
     print(f"\n🔧 {description}")
     print("=" * 50)
-    print(f"Command: {cmd}")
+    print(f"Command: {' '.join(cmd)}")
     print()
     
-    result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
+    # The command is run directly, without a shell in between
+    result = subprocess.run(cmd, capture_output=True, text=True)
     
     if result.returncode == 0:
         print(result.stdout)
@@ -32,23 +67,35 @@ def main():
     print("=" * 60)
     print("Testing the new organized project structure...")
     
+    # Keep the tools' progress messages out of the test output
+    logging.getLogger().setLevel(logging.WARNING)
+    generator = RiscVCodeGenerator()
+    validator = RiscVValidator()
+    
     # Test 1: Generate specific instructions
-    if not run_command(
-        "python3 tools/generate_riscv_code.py add sub addi --count 2 --save-to-output",
+    instructions = ["add", "sub", "addi"]
+    if not run_step(
+        lambda: save_to_output(
+            generator.generate_code_for_instructions(instructions, 2),
+            generator.generate_output_filename(instructions=instructions, count=2)
+        ),
         "Generate specific instructions"
     ):
         return False
     
     # Test 2: Generate format-specific instructions
-    if not run_command(
-        "python3 tools/generate_riscv_code.py --format R --count 3 --save-to-output",
+    if not run_step(
+        lambda: save_to_output(
+            generator.generate_format_code('R', 3),
+            generator.generate_output_filename(format_type='R', count=3)
+        ),
         "Generate R-type instructions"
     ):
         return False
     
     # Test 3: List available files
     if not run_command(
-        "ls -la output/",
+        ["ls", "-la", "output/"],
         "List generated files"
     ):
         return False
@@ -59,18 +106,25 @@ def main():
         s_files = list(output_dir.glob("*.s"))
         if s_files:
             first_file = s_files[0]
-            if not run_command(
-                f"python3 tools/validate_riscv_code.py {first_file}",
-                f"Validate {first_file.name}"
-            ):
+            
+            def validate_first_file():
+                results = validator.validate_assembly_file(str(first_file))
+                validator.print_validation_report(results)
+                return results['valid']
+            
+            if not run_step(validate_first_file, f"Validate {first_file.name}"):
                 return False
         else:
             print("❌ No .s files found in output directory")
             return False
     
     # Test 5: Show project structure
+    if shutil.which("tree"):
+        structure_cmd = ["tree", "-L", "2", "-a"]
+    else:
+        structure_cmd = ["find", ".", "-maxdepth", "2", "-type", "d"]
     if not run_command(
-        "tree -L 2 -a 2>/dev/null || find . -maxdepth 2 -type d | sort",
+        structure_cmd,
         "Show new project structure"
     ):
         return False
@@ -20,17 +20,66 @@ import sys
 import re
 import json
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple, Union
+from typing import Iterable, List, Dict, Optional, Tuple, Union
 import logging
+from functools import lru_cache
+from itertools import islice
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Add the src directory to the path to import riscv_tools
 sys.path.append(str(Path(__file__).parent.parent / "src"))
-from riscv_tools import RiscVTestGenerator
+from test_generator import RiscVTestGenerator
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 logger = logging.getLogger(__name__)
 
+# Immediate range of each instruction format, and whether the immediate must be even
+_IMMEDIATE_RANGES = {
+    'I': (-2048, 2047, False),      # 12-bit signed immediate
+    'S': (-2048, 2047, False),      # 12-bit signed immediate
+    'B': (-2048, 2047, True),       # 12-bit signed immediate, aligned to 2 bytes
+    'U': (0, 0xFFFFF, False),       # 20-bit immediate in upper bits
+    'J': (-524288, 524287, True),   # 20-bit signed immediate, aligned to 2 bytes
+}
+
+# Size of the read buffer of validated files
+READ_BUFFER_SIZE = 1 << 20
+
+# Number of distinct lines whose validation results are kept by a validator
+LINE_CACHE_SIZE = 4096
+
+# Number of lines a worker validates at a time with --jobs; inputs of a single
+# chunk are validated in-process even with --jobs
+PARALLEL_CHUNK_SIZE = 10000
+
+# Validator of a worker process, built once by its initializer
+_worker_validator = None
+
+def _init_worker():
+    global _worker_validator
+    logging.getLogger().setLevel(logging.WARNING)
+    _worker_validator = RiscVValidator()
+
+def _validate_chunk(unit) -> List[Dict]:
+    first_line_num, lines = unit
+    return [_worker_validator.validate_assembly_line(line.strip(), line_num)
+            for line_num, line in enumerate(lines, first_line_num)]
+
+def _encode_json(results: Dict) -> bytes:
+    """Encode results as JSON indented by 2 spaces, using orjson when it is installed."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(results, option=orjson.OPT_INDENT_2)
+        except TypeError:
+            # orjson rejects integers wider than 64 bits, such as huge immediates
+            pass
+    return json.dumps(results, indent=2).encode()
+
 class RiscVValidator:
     """Validates RISC-V assembly code for correctness."""
     
@@ -40,39 +89,42 @@ class RiscVValidator:
         self.validation_warnings = []
         
         # Compile regex patterns for parsing
-        self.register_pattern = re.compile(r'^x(\d+)$')  # Any x followed by digits
-        self.immediate_pattern = re.compile(r'^-?\d+$')
         self.instruction_pattern = re.compile(r'^([a-zA-Z][a-zA-Z0-9_.]*)\s*(.*)$')
         
-    def validate_assembly_file(self, file_path: str) -> Dict:
+        # Validation results of each distinct line content
+        self._validate_line_content = lru_cache(maxsize=LINE_CACHE_SIZE)(self._validate_line_content)
+        
+    def validate_assembly_file(self, file_path: str, jobs: int = 1) -> Dict:
         """
         Validate an entire assembly file.
         
         Args:
             file_path: Path to assembly file
+            jobs: Number of worker processes for large files
             
         Returns:
             Dictionary with validation results
         """
+        # The lines are validated as they are read, without holding the whole file
         try:
-            with open(file_path, 'r') as f:
-                lines = f.readlines()
-        except Exception as e:
+            with open(file_path, 'r', buffering=READ_BUFFER_SIZE) as f:
+                return self.validate_assembly_lines(f, file_path, jobs)
+        except (OSError, UnicodeDecodeError) as e:
             return {
                 'valid': False,
                 'error': f"Failed to read file: {e}",
                 'line_results': []
             }
-        
-        return self.validate_assembly_lines(lines, file_path)
     
-    def validate_assembly_lines(self, lines: List[str], source: str = "input") -> Dict:
+    def validate_assembly_lines(self, lines: Iterable[str], source: str = "input",
+                                jobs: int = 1) -> Dict:
         """
         Validate a list of assembly lines.
         
         Args:
-            lines: List of assembly code lines
+            lines: List of assembly code lines, or any iterable of them such as an open file
             source: Source identifier for error reporting
+            jobs: Number of worker processes for large inputs
             
         Returns:
             Dictionary with validation results
@@ -80,7 +132,7 @@ class RiscVValidator:
         results = {
             'valid': True,
             'source': source,
-            'total_lines': len(lines),
+            'total_lines': 0,
             'instruction_lines': 0,
             'valid_instructions': 0,
             'errors': [],
@@ -88,8 +140,13 @@ class RiscVValidator:
             'line_results': []
         }
         
-        for line_num, line in enumerate(lines, 1):
-            line_result = self.validate_assembly_line(line.strip(), line_num)
+        if jobs > 1:
+            line_results = self._validate_in_workers(lines, jobs)
+        else:
+            line_results = (self.validate_assembly_line(line.strip(), line_num)
+                            for line_num, line in enumerate(lines, 1))
+        
+        for line_result in line_results:
             results['line_results'].append(line_result)
             
             if line_result['type'] == 'instruction':
@@ -103,8 +160,44 @@ class RiscVValidator:
             results['errors'].extend(line_result.get('errors', []))
             results['warnings'].extend(line_result.get('warnings', []))
         
+        results['total_lines'] = len(results['line_results'])
         return results
     
+    def _validate_in_workers(self, lines: Iterable[str], jobs: int) -> Iterable[Dict]:
+        """
+        Validate assembly lines in worker processes, in chunks of consecutive lines.
+        
+        Args:
+            lines: Iterable of assembly code lines
+            jobs: Number of worker processes
+            
+        Returns:
+            Line validation results, in line order
+        """
+        lines = iter(lines)
+        first_chunk = list(islice(lines, PARALLEL_CHUNK_SIZE))
+        if len(first_chunk) < PARALLEL_CHUNK_SIZE:
+            # Starting the workers costs more than validating a single chunk
+            return [self.validate_assembly_line(line.strip(), line_num)
+                    for line_num, line in enumerate(first_chunk, 1)]
+        
+        units = [(1, first_chunk)]
+        while True:
+            chunk = list(islice(lines, PARALLEL_CHUNK_SIZE))
+            if not chunk:
+                break
+            units.append((units[-1][0] + PARALLEL_CHUNK_SIZE, chunk))
+        
+        # Imported here, as it adds to the start-up time of every other use of the tool
+        from concurrent.futures import ProcessPoolExecutor
+        
+        logger.info(f"Validating {len(units)} chunks of lines with {jobs} workers")
+        line_results = []
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as pool:
+            for chunk_results in pool.map(_validate_chunk, units):
+                line_results.extend(chunk_results)
+        return line_results
+    
     def validate_assembly_line(self, line: str, line_num: int = 1) -> Dict:
         """
         Validate a single assembly line.
@@ -116,29 +209,50 @@ class RiscVValidator:
         Returns:
             Dictionary with line validation results
         """
-        result = {
+        # Skip empty lines and comments before the cache lookup, as they need no validation
+        if not line or line[0] == '#':
+            return {
+                'line_number': line_num,
+                'line': line,
+                'type': 'comment',
+                'valid': True,
+                'errors': [],
+                'warnings': [],
+                'instruction': None,
+                'parameters': {}
+            }
+        
+        line_type, valid, instruction, parameters, errors, warnings = self._validate_line_content(line)
+        return {
             'line_number': line_num,
             'line': line,
-            'type': 'unknown',
-            'valid': True,
-            'errors': [],
-            'warnings': [],
-            'instruction': None,
-            'parameters': {}
+            'type': line_type,
+            'valid': valid,
+            'errors': [f"Line {line_num}: {error}" for error in errors],
+            'warnings': [f"Line {line_num}: {warning}" for warning in warnings],
+            'instruction': instruction,
+            'parameters': {key: dict(param) for key, param in parameters.items()}
         }
+    
+    def _validate_line_content(self, line: str) -> Tuple:
+        """
+        Validate a single assembly line that is not empty or a comment,
+        independently of its line number.
         
-        # Skip empty lines and comments
-        if not line or line.startswith('#'):
-            result['type'] = 'comment'
-            return result
+        Results are cached per validator by line content, as assembly files
+        repeat many of their lines. They are shared and must not be modified.
         
+        Args:
+            line: Assembly code line
+            
+        Returns:
+            Tuple of the line type, validity, instruction name, parsed parameters,
+            and the errors and warnings without their line number
+        """
         # Parse instruction
         match = self.instruction_pattern.match(line)
         if not match:
-            result['type'] = 'invalid'
-            result['valid'] = False
-            result['errors'].append(f"Line {line_num}: Invalid instruction format")
-            return result
+            return 'invalid', False, None, {}, ("Invalid instruction format",), ()
         
         instruction_name = match.group(1).lower()
         params_str = match.group(2).strip()
@@ -147,37 +261,27 @@ class RiscVValidator:
         if '#' in params_str:
             params_str = params_str.split('#')[0].strip()
         
-        result['type'] = 'instruction'
-        result['instruction'] = instruction_name
-        
         # Get instruction information
-        instr_info = self.test_generator.get_instruction_info(instruction_name)
+        # The instruction info is only read, so the index entry is not copied
+        instr_info = self.test_generator._get_instruction_entry(instruction_name)
         if not instr_info:
-            result['valid'] = False
-            result['errors'].append(f"Line {line_num}: Unknown instruction '{instruction_name}'")
-            return result
+            return ('instruction', False, instruction_name, {},
+                    (f"Unknown instruction '{instruction_name}'",), ())
         
         # Parse parameters
-        parsed_params = self._parse_parameters(params_str, line_num)
+        parsed_params = self._parse_parameters(params_str)
         if parsed_params is None:
-            result['valid'] = False
-            result['errors'].append(f"Line {line_num}: Failed to parse parameters")
-            return result
-        
-        result['parameters'] = parsed_params
+            return 'instruction', False, instruction_name, {}, ("Failed to parse parameters",), ()
         
         # Validate parameters against instruction definition
         validation_result = self._validate_instruction_parameters(
-            instruction_name, instr_info, parsed_params, line_num
+            instruction_name, instr_info, parsed_params
         )
         
-        result['valid'] = validation_result['valid']
-        result['errors'].extend(validation_result['errors'])
-        result['warnings'].extend(validation_result['warnings'])
-        
-        return result
+        return ('instruction', validation_result['valid'], instruction_name, parsed_params,
+                tuple(validation_result['errors']), tuple(validation_result['warnings']))
     
-    def _parse_parameters(self, params_str: str, line_num: int) -> Optional[Dict]:
+    def _parse_parameters(self, params_str: str) -> Optional[Dict]:
         """Parse parameter string into components."""
         if not params_str.strip():
             return {}
@@ -188,17 +292,17 @@ class RiscVValidator:
             parsed = {}
             
             for i, part in enumerate(param_parts):
-                # Determine parameter type
-                reg_match = self.register_pattern.match(part)
-                if reg_match:
+                # Determine parameter type with string tests; isdecimal accepts
+                # the same digits as the \d of a regex
+                if part[:1] == 'x' and part[1:].isdecimal():
                     # Register parameter (validate range later)
-                    reg_num = int(reg_match.group(1))
+                    reg_num = int(part[1:])
                     parsed[f'param_{i}'] = {
                         'type': 'register',
                         'value': part,
                         'numeric_value': reg_num
                     }
-                elif self.immediate_pattern.match(part):
+                elif (part[1:] if part[:1] == '-' else part).isdecimal():
                     # Immediate parameter
                     imm_val = int(part)
                     parsed[f'param_{i}'] = {
@@ -217,11 +321,11 @@ class RiscVValidator:
             return parsed
             
         except Exception as e:
-            logger.debug(f"Parameter parsing error on line {line_num}: {e}")
+            logger.debug("Parameter parsing error in '%s': %s", params_str, e)
             return None
     
     def _validate_instruction_parameters(self, instruction_name: str, instr_info: Dict, 
-                                       parsed_params: Dict, line_num: int) -> Dict:
+                                       parsed_params: Dict) -> Dict:
         """Validate parsed parameters against instruction definition."""
         result = {
             'valid': True,
@@ -235,7 +339,7 @@ class RiscVValidator:
         if len(parsed_params) != len(expected_params):
             result['valid'] = False
             result['errors'].append(
-                f"Line {line_num}: {instruction_name} expects {len(expected_params)} "
+                f"{instruction_name} expects {len(expected_params)} "
                 f"parameters, got {len(parsed_params)}"
             )
             return result
@@ -257,7 +361,7 @@ class RiscVValidator:
             if expected_type != actual_type:
                 result['valid'] = False
                 result['errors'].append(
-                    f"Line {line_num}: Parameter {i+1} ({param_name}) should be "
+                    f"Parameter {i+1} ({param_name}) should be "
                     f"{expected_type}, got {actual_type}"
                 )
                 continue
@@ -265,7 +369,7 @@ class RiscVValidator:
             # Validate parameter constraints
             if expected_type == 'register':
                 reg_result = self._validate_register_constraints(
-                    parsed_param['numeric_value'], constraints, param_name, line_num
+                    parsed_param['numeric_value'], constraints, param_name
                 )
                 if not reg_result['valid']:
                     result['valid'] = False
@@ -275,7 +379,7 @@ class RiscVValidator:
             elif expected_type == 'immediate':
                 imm_result = self._validate_immediate_constraints(
                     parsed_param['numeric_value'], constraints, param_name, 
-                    instr_info.get('format', 'Unknown'), line_num
+                    instr_info.get('format', 'Unknown')
                 )
                 if not imm_result['valid']:
                     result['valid'] = False
@@ -285,7 +389,7 @@ class RiscVValidator:
         return result
     
     def _validate_register_constraints(self, reg_value: int, constraints: Dict, 
-                                     param_name: str, line_num: int) -> Dict:
+                                     param_name: str) -> Dict:
         """Validate register parameter constraints."""
         result = {
             'valid': True,
@@ -301,7 +405,7 @@ class RiscVValidator:
         if reg_value < min_val or reg_value > max_val:
             result['valid'] = False
             result['errors'].append(
-                f"Line {line_num}: Register {param_name} (x{reg_value}) out of range "
+                f"Register {param_name} (x{reg_value}) out of range "
                 f"[{min_val}-{max_val}]"
             )
         
@@ -309,20 +413,20 @@ class RiscVValidator:
         if reg_value in exclude:
             result['valid'] = False
             result['errors'].append(
-                f"Line {line_num}: Register {param_name} (x{reg_value}) is excluded "
+                f"Register {param_name} (x{reg_value}) is excluded "
                 f"for this instruction"
             )
         
         # Warning for x0 usage in destination
         if reg_value == 0 and param_name == 'rd':
             result['warnings'].append(
-                f"Line {line_num}: Writing to x0 (zero register) has no effect"
+                f"Writing to x0 (zero register) has no effect"
             )
         
         return result
     
     def _validate_immediate_constraints(self, imm_value: int, constraints: Dict, 
-                                      param_name: str, inst_format: str, line_num: int) -> Dict:
+                                      param_name: str, inst_format: str) -> Dict:
         """Validate immediate parameter constraints."""
         result = {
             'valid': True,
@@ -330,68 +434,30 @@ class RiscVValidator:
             'warnings': []
         }
         
-        min_val = constraints.get('min', -2048)
-        max_val = constraints.get('max', 2047)
-        
         # Format-specific constraints
-        if inst_format == 'I':
-            # I-Type: 12-bit signed immediate
-            if imm_value < -2048 or imm_value > 2047:
-                result['valid'] = False
-                result['errors'].append(
-                    f"Line {line_num}: I-Type immediate {param_name} ({imm_value}) "
-                    f"out of range [-2048, 2047]"
-                )
-        elif inst_format == 'S':
-            # S-Type: 12-bit signed immediate
-            if imm_value < -2048 or imm_value > 2047:
+        format_range = _IMMEDIATE_RANGES.get(inst_format)
+        if format_range is not None:
+            low, high, aligned = format_range
+            if imm_value < low or imm_value > high:
                 result['valid'] = False
                 result['errors'].append(
-                    f"Line {line_num}: S-Type immediate {param_name} ({imm_value}) "
-                    f"out of range [-2048, 2047]"
+                    f"{inst_format}-Type immediate {param_name} ({imm_value}) "
+                    f"out of range [{low}, {high}]"
                 )
-        elif inst_format == 'B':
-            # B-Type: 12-bit signed immediate, must be even
-            if imm_value < -2048 or imm_value > 2047:
+            if aligned and imm_value & 1:
                 result['valid'] = False
                 result['errors'].append(
-                    f"Line {line_num}: B-Type immediate {param_name} ({imm_value}) "
-                    f"out of range [-2048, 2047]"
-                )
-            if imm_value % 2 != 0:
-                result['valid'] = False
-                result['errors'].append(
-                    f"Line {line_num}: B-Type immediate {param_name} ({imm_value}) "
-                    f"must be even (aligned to 2 bytes)"
-                )
-        elif inst_format == 'U':
-            # U-Type: 20-bit immediate in upper bits
-            if imm_value < 0 or imm_value > 0xFFFFF:
-                result['valid'] = False
-                result['errors'].append(
-                    f"Line {line_num}: U-Type immediate {param_name} ({imm_value}) "
-                    f"out of range [0, {0xFFFFF}]"
-                )
-        elif inst_format == 'J':
-            # J-Type: 20-bit signed immediate, must be even
-            if imm_value < -524288 or imm_value > 524287:
-                result['valid'] = False
-                result['errors'].append(
-                    f"Line {line_num}: J-Type immediate {param_name} ({imm_value}) "
-                    f"out of range [-524288, 524287]"
-                )
-            if imm_value % 2 != 0:
-                result['valid'] = False
-                result['errors'].append(
-                    f"Line {line_num}: J-Type immediate {param_name} ({imm_value}) "
+                    f"{inst_format}-Type immediate {param_name} ({imm_value}) "
                     f"must be even (aligned to 2 bytes)"
                 )
+            return result
         
         # Check general constraints only for non-format-specific cases
-        # Skip this check for types that have format-specific validation
-        if inst_format not in ['U', 'J', 'I', 'S', 'B'] and (imm_value < min_val or imm_value > max_val):
+        min_val = constraints.get('min', -2048)
+        max_val = constraints.get('max', 2047)
+        if imm_value < min_val or imm_value > max_val:
             result['warnings'].append(
-                f"Line {line_num}: Immediate {param_name} ({imm_value}) outside "
+                f"Immediate {param_name} ({imm_value}) outside "
                 f"typical range [{min_val}, {max_val}]"
             )
         
@@ -399,47 +465,40 @@ class RiscVValidator:
     
     def print_validation_report(self, results: Dict, verbose: bool = False):
         """Print a formatted validation report."""
-        print(f"\n=== RISC-V Code Validation Report ===")
-        print(f"Source: {results['source']}")
-        print(f"Total lines: {results['total_lines']}")
-        print(f"Instruction lines: {results['instruction_lines']}")
-        print(f"Valid instructions: {results['valid_instructions']}")
-        print(f"Overall result: {'✓ VALID' if results['valid'] else '✗ INVALID'}")
+        # The report is built first and written at once, as it has a line per error
+        out = [
+            f"\n=== RISC-V Code Validation Report ===",
+            f"Source: {results['source']}",
+            f"Total lines: {results['total_lines']}",
+            f"Instruction lines: {results['instruction_lines']}",
+            f"Valid instructions: {results['valid_instructions']}",
+            f"Overall result: {'✓ VALID' if results['valid'] else '✗ INVALID'}",
+        ]
         
         # Print errors
         if results['errors']:
-            print(f"\n🔴 Errors ({len(results['errors'])}):")
-            for error in results['errors']:
-                print(f"  {error}")
+            out.append(f"\n🔴 Errors ({len(results['errors'])}):")
+            out.extend(f"  {error}" for error in results['errors'])
         
         # Print warnings
         if results['warnings']:
-            print(f"\n🟡 Warnings ({len(results['warnings'])}):")
-            for warning in results['warnings']:
-                print(f"  {warning}")
+            out.append(f"\n🟡 Warnings ({len(results['warnings'])}):")
+            out.extend(f"  {warning}" for warning in results['warnings'])
         
         # Print line-by-line results if verbose
         if verbose and results['line_results']:
-            print(f"\n📋 Line-by-line Results:")
+            out.append(f"\n📋 Line-by-line Results:")
+            append = out.append
             for line_result in results['line_results']:
-                line_num = line_result['line_number']
-                line_type = line_result['type']
-                valid = line_result['valid']
-                
-                if line_type == 'instruction':
-                    status = "✓" if valid else "✗"
+                if line_result['type'] == 'instruction':
+                    status = "✓" if line_result['valid'] else "✗"
                     instruction = line_result.get('instruction', 'unknown')
-                    print(f"  {line_num:3d}: {status} {instruction}")
-                    
-                    if line_result['errors']:
-                        for error in line_result['errors']:
-                            print(f"       🔴 {error}")
-                    
-                    if line_result['warnings']:
-                        for warning in line_result['warnings']:
-                            print(f"       🟡 {warning}")
+                    append(f"  {line_result['line_number']:3d}: {status} {instruction}")
+                    out.extend(f"       🔴 {error}" for error in line_result['errors'])
+                    out.extend(f"       🟡 {warning}" for warning in line_result['warnings'])
         
-        print()
+        out.append("\n")
+        sys.stdout.write("\n".join(out))
 
 def main():
     parser = argparse.ArgumentParser(
@@ -485,6 +544,13 @@ Examples:
         help='Only output final result (valid/invalid)'
     )
     
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=1,
+        help='Number of worker processes for large inputs (default: 1)'
+    )
+    
     args = parser.parse_args()
     
     # Validate input arguments
@@ -508,9 +574,9 @@ Examples:
     try:
         if args.stdin:
             lines = sys.stdin.readlines()
-            results = validator.validate_assembly_lines(lines, "stdin")
+            results = validator.validate_assembly_lines(lines, "stdin", args.jobs)
         else:
-            results = validator.validate_assembly_file(args.file)
+            results = validator.validate_assembly_file(args.file, args.jobs)
     except Exception as e:
         print(f"Error: Validation failed: {e}")
         sys.exit(1)
@@ -518,8 +584,10 @@ Examples:
     # Output results
     if args.json_output:
         try:
-            with open(args.json_output, 'w') as f:
-                json.dump(results, f, indent=2)
+            # Encoded before the file is opened, so that a failure leaves no empty file
+            data = _encode_json(results)
+            with open(args.json_output, 'wb') as f:
+                f.write(data)
             print(f"Validation results written to {args.json_output}")
         except Exception as e:
             print(f"Error: Failed to write JSON output: {e}")